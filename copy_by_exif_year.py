@@ -7,16 +7,20 @@ are copied into <dst>/<year>/, using DateTimeOriginal parsed by exiftool.
 Files missing DateTimeOriginal can be skipped or dropped into a configurable
 fallback folder (default: Unknown).
 """
+import json
 import os
-import re
 import shutil
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import click
 
 DEFAULT_EXTS = {".jpg", ".jpeg", ".png", ".heic", ".mp4", ".mov"}  # case-insensitive
-YEAR_RE = re.compile(r"^(\d{4}):\d{2}:\d{2}\s")
+
+# Keep each exiftool invocation well under ARG_MAX-sized argfiles.
+BATCH_SIZE = 2000
 
 def require_exiftool() -> None:
     """Exit if exiftool is not installed or not runnable."""
@@ -25,19 +29,231 @@ def require_exiftool() -> None:
     except Exception:
         raise SystemExit("exiftool not found. Install with: brew install exiftool")
 
-def get_datetimeoriginal(path: Path) -> str | None:
-    """Return DateTimeOriginal for a path or None when unavailable."""
-    # -s -s -s => value only
-    # -api LargeFileSupport=1 helps with big videos
-    res = subprocess.run(
-        ["exiftool", "-api", "LargeFileSupport=1", "-s", "-s", "-s", "-DateTimeOriginal", str(path)],
-        capture_output=True,
-        text=True,
-    )
-    if res.returncode != 0:
-        return None
-    val = (res.stdout or "").strip()
-    return val or None
+class ExifToolDaemon:
+    """A single long-lived exiftool process in -stay_open batch mode.
+
+    One perl process services every query written to its stdin, so the
+    interpreter/module startup is paid once per run instead of once per
+    invocation. Each query is terminated with a numbered -execute and its
+    output is read up to the matching {ready#} sentinel.
+    """
+
+    def __init__(self) -> None:
+        self._proc = subprocess.Popen(
+            ["exiftool", "-stay_open", "True", "-@", "-"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        self._seq = 0
+
+    def execute(self, args: list[str]) -> str:
+        """Run one exiftool command and return its stdout."""
+        self._seq += 1
+        token = f"{{ready{self._seq}}}"
+        self._proc.stdin.write("\n".join(args) + f"\n-execute{self._seq}\n")
+        self._proc.stdin.flush()
+        lines: list[str] = []
+        while True:
+            line = self._proc.stdout.readline()
+            if not line or line.strip() == token:
+                break
+            lines.append(line)
+        return "".join(lines)
+
+    def close(self) -> None:
+        try:
+            self._proc.stdin.write("-stay_open\nFalse\n")
+            self._proc.stdin.flush()
+            self._proc.wait(timeout=5)
+        except Exception:
+            self._proc.kill()
+
+    def __enter__(self) -> "ExifToolDaemon":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def batch_datetimeoriginal(files: list[Path], et: ExifToolDaemon) -> dict[str, str | None]:
+    """Return {source path: DateTimeOriginal or None} for all files in one pass.
+
+    Paths are fed to the stay_open daemon in chunks so each query stays a
+    manageable size while still amortizing exiftool startup across the run.
+    """
+    results: dict[str, str | None] = {str(p): None for p in files}
+    for start in range(0, len(files), BATCH_SIZE):
+        chunk = files[start:start + BATCH_SIZE]
+        args = ["-json", "-DateTimeOriginal", "-api", "LargeFileSupport=1"]
+        args += [str(p) for p in chunk]
+        out = et.execute(args)
+        if not out.strip():
+            continue
+        try:
+            records = json.loads(out)
+        except json.JSONDecodeError:
+            continue
+        for rec in records:
+            src = rec.get("SourceFile")
+            if src:
+                results[src] = rec.get("DateTimeOriginal") or None
+    return results
+
+def load_exif_cache(path: Path) -> dict:
+    """Load the {path: [size, mtime_ns, DateTimeOriginal]} cache, or {}."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_exif_cache(path: Path, cache: dict) -> None:
+    """Write the cache atomically (write to a temp file, then rename)."""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(cache), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def lookup_datetimeoriginal(
+    files: list[Path], cache_file: Path | None
+) -> dict[str, str | None]:
+    """Resolve DateTimeOriginal for all files, via the cache when possible.
+
+    With a cache file, only files whose (size, mtime_ns) changed since the
+    last run are handed to exiftool, so reruns over a mostly-unchanged
+    library cost O(new files) instead of O(library).
+    """
+    if cache_file is None:
+        with ExifToolDaemon() as et:
+            return batch_datetimeoriginal(files, et)
+
+    cache = load_exif_cache(cache_file)
+    results: dict[str, str | None] = {}
+    to_query: list[tuple[Path, os.stat_result]] = []
+
+    for p in files:
+        key = str(p)
+        try:
+            st = p.stat()
+        except OSError:
+            results[key] = None
+            continue
+        ent = cache.get(key)
+        if ent and ent[0] == st.st_size and ent[1] == st.st_mtime_ns:
+            results[key] = ent[2]
+        else:
+            to_query.append((p, st))
+
+    if to_query:
+        with ExifToolDaemon() as et:
+            fresh = batch_datetimeoriginal([p for p, _ in to_query], et)
+        for p, st in to_query:
+            key = str(p)
+            dto = fresh.get(key)
+            results[key] = dto
+            cache[key] = [st.st_size, st.st_mtime_ns, dto]
+
+    save_exif_cache(cache_file, cache)
+    return results
+
+
+FICLONE = 0x40049409  # Linux ioctl: share extents with the source (reflink)
+
+def _kernel_copy(src: Path, dest: Path) -> bool:
+    """Copy file bytes entirely in-kernel via copy_file_range.
+
+    The data never crosses into userspace, and filesystems that support it
+    (XFS, Btrfs, NFS 4.2) can turn the whole copy into a reflink or
+    server-side copy. Returns False when the platform or filesystem can't,
+    so the caller can fall back to shutil.
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+    try:
+        with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if n == 0:
+                    raise OSError("copy_file_range stopped short")
+                remaining -= n
+        shutil.copystat(src, dest)
+        return True
+    except OSError:
+        # keep dest: it is the caller's name reservation and the shutil
+        # fallback truncates it on open
+        return False
+
+
+def transfer_file(src: Path, dest: Path, mode: str) -> None:
+    """Materialize src at dest by hardlink, reflink or plain copy.
+
+    Hardlinks and reflinks skip reading/writing the file bytes entirely when
+    source and destination share a filesystem; both fall back to copy2 when
+    the filesystem refuses (cross-device links, no reflink support).
+    """
+    if mode == "hardlink":
+        # dest already exists as a zero-byte reservation (_process_one
+        # creates it under the year lock), so link beside it and rename
+        # over; plain os.link would refuse the existing name.
+        tmp = dest.with_name(dest.name + ".lnktmp")
+        try:
+            os.link(src, tmp)
+            os.replace(tmp, dest)
+            return
+        except OSError:
+            tmp.unlink(missing_ok=True)
+    elif mode == "reflink":
+        try:
+            import fcntl
+            with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src, dest)
+            return
+        except (ImportError, OSError):
+            # leave dest in place: it doubles as the name reservation and
+            # the fallback copy truncates it anyway
+            pass
+    if _kernel_copy(src, dest):
+        return
+    shutil.copy2(src, dest)  # preserves file times/metadata at filesystem level
+
+
+def iter_media(root: Path, exts: set[str]):
+    """Yield files under root whose extension is in exts (lowercase).
+
+    Walks with os.scandir so file-vs-directory checks come from the cached
+    directory entry instead of a stat() per path, which rglob pays.
+    """
+    stack = [str(root)]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                except OSError:
+                    continue
+                name = entry.name
+                i = name.rfind(".")
+                if i >= 0 and name[i:].lower() in exts:
+                    yield Path(entry.path)
+
+
+# Highest suffix index already handed out per (dest_dir, base, ext), so
+# repeated collisions on the same name resume probing where the last call
+# stopped instead of rescanning from _1 every time.
+_collision_counter: dict[tuple[Path, str, str], int] = {}
 
 def unique_dest_path(dest_dir: Path, filename: str) -> Path:
     """Return a destination path that avoids collisions by appending _N if needed."""
@@ -46,13 +262,64 @@ def unique_dest_path(dest_dir: Path, filename: str) -> Path:
     candidate = dest_dir / (base + ext)
     if not candidate.exists():
         return candidate
-    i = 1
+    key = (dest_dir, base, ext)
+    i = _collision_counter.get(key, 0) + 1
     while True:
         candidate = dest_dir / f"{base}_{i}{ext}"
         if not candidate.exists():
+            _collision_counter[key] = i
             return candidate
         i += 1
 
+def _process_one(
+    p: Path,
+    dto: str | None,
+    dst_root: Path,
+    unknown_name: str | None,
+    dry_run: bool,
+    link_mode: str,
+    year_locks: dict[str, threading.Lock],
+    locks_guard: threading.Lock,
+) -> str:
+    """Copy one file into its year folder; returns 'copy', 'unknown' or 'skip'."""
+    # DateTimeOriginal has a fixed "YYYY:MM:DD HH:MM:SS" layout, so the year
+    # is a straight 4-byte slice -- no regex needed.
+    year = None
+    if dto and len(dto) >= 5 and dto[:4].isdigit() and dto[4] == ":":
+        year = dto[:4]
+
+    status = "copy"
+    if not year:
+        if unknown_name is None:
+            print(f"[SKIP no DateTimeOriginal] {p}")
+            return "skip"
+        year = unknown_name
+        status = "unknown"
+
+    out_dir = dst_root / year
+
+    # One lock per year folder makes the check-then-create of mkdir and
+    # unique_dest_path atomic across worker threads.
+    with locks_guard:
+        lock = year_locks.setdefault(year, threading.Lock())
+
+    with lock:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        dest = unique_dest_path(out_dir, p.name)
+        if dry_run:
+            print(f"[DRYRUN COPY] {p} -> {dest}")
+            return status
+        # Reserve the name while holding the lock so unique_dest_path can't
+        # hand it out twice; the byte transfer runs outside the lock so
+        # copies into the same year folder proceed in parallel.
+        os.close(os.open(dest, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+
+    transfer_file(p, dest, link_mode)
+
+    print(f"[COPY] {p} -> {dest}")
+    return status
+
+
 @click.command()
 @click.argument("src_root", type=click.Path(path_type=Path, exists=True, readable=True), metavar="SRC")
 @click.argument("dst_root", type=click.Path(path_type=Path), metavar="DST")
@@ -73,7 +340,37 @@ def unique_dest_path(dest_dir: Path, filename: str) -> Path:
     is_flag=True,
     help="Show what would be copied without writing files.",
 )
-def main(src_root: Path, dst_root: Path, exts: tuple[str, ...], unknown_folder: str, dry_run: bool) -> None:
+@click.option(
+    "--threads",
+    default=4,
+    show_default=True,
+    type=int,
+    help="Number of worker threads for the copy phase.",
+)
+@click.option(
+    "--cache-file",
+    type=click.Path(path_type=Path),
+    default=None,
+    help="JSON cache of EXIF reads keyed by (path, size, mtime); makes reruns skip unchanged files.",
+)
+@click.option(
+    "--link",
+    "link_mode",
+    type=click.Choice(["copy", "hardlink", "reflink", "auto"]),
+    default="copy",
+    show_default=True,
+    help="Transfer mode. 'auto' hardlinks when SRC and DST share a filesystem.",
+)
+def main(
+    src_root: Path,
+    dst_root: Path,
+    exts: tuple[str, ...],
+    unknown_folder: str,
+    dry_run: bool,
+    threads: int,
+    cache_file: Path | None,
+    link_mode: str,
+) -> None:
     """Copy media into year folders derived from DateTimeOriginal, with configurable filters and fallbacks."""
     require_exiftool()
 
@@ -84,42 +381,42 @@ def main(src_root: Path, dst_root: Path, exts: tuple[str, ...], unknown_folder:
     chosen_exts = {e.lower() for e in exts} if exts else set(DEFAULT_EXTS)
     unknown_name = unknown_folder if unknown_folder != "" else None
 
-    total = copied = unknown = skipped = 0
+    if link_mode == "auto":
+        same_fs = os.stat(src_root).st_dev == os.stat(dst_root).st_dev
+        link_mode = "hardlink" if same_fs else "copy"
 
-    for p in src_root.rglob("*"):
-        if not p.is_file():
-            continue
-        if p.suffix.lower() not in chosen_exts:
-            continue
+    files = list(iter_media(src_root, chosen_exts))
+    dto_by_path = lookup_datetimeoriginal(files, cache_file)
 
-        total += 1
-        dto = get_datetimeoriginal(p)
-        year = None
-        if dto:
-            m = YEAR_RE.match(dto)
-            if m:
-                year = m.group(1)
+    total = copied = unknown = skipped = 0
+    year_locks: dict[str, threading.Lock] = {}
+    locks_guard = threading.Lock()
 
-        if not year:
-            if unknown_name is None:
+    # The copy phase is I/O-bound, so threads overlap reads and writes.
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as ex:
+        futs = [
+            ex.submit(
+                _process_one,
+                p,
+                dto_by_path.get(str(p)),
+                dst_root,
+                unknown_name,
+                dry_run,
+                link_mode,
+                year_locks,
+                locks_guard,
+            )
+            for p in files
+        ]
+        for fut in as_completed(futs):
+            total += 1
+            status = fut.result()
+            if status == "skip":
                 skipped += 1
-                print(f"[SKIP no DateTimeOriginal] {p}")
                 continue
-            year = unknown_name
-            unknown += 1
-
-        out_dir = dst_root / year
-        out_dir.mkdir(parents=True, exist_ok=True)
-
-        dest = unique_dest_path(out_dir, p.name)
-        if dry_run:
+            if status == "unknown":
+                unknown += 1
             copied += 1
-            print(f"[DRYRUN COPY] {p} -> {dest}")
-            continue
-
-        shutil.copy2(p, dest)  # preserves file times/metadata at filesystem level
-        copied += 1
-        print(f"[COPY] {p} -> {dest}")
 
     print("\nSummary")
     print(f"  total matched extensions: {total}")
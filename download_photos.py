@@ -1,13 +1,13 @@
+import asyncio
 import json
 import os
 import re
-import time
 from datetime import datetime, timezone
 from pathlib import Path
 
+import aiohttp
 import click
-import requests
-from playwright.sync_api import TimeoutError as PWTimeout, sync_playwright
+from playwright.async_api import TimeoutError as PWTimeout, async_playwright
 import subprocess
 
 DEFAULT_JSON_RELATIVE = "your_facebook_activity/activity_youre_tagged_in/photos_and_videos_you're_tagged_in.json"
@@ -34,20 +34,59 @@ def exif_datetime_str(ts: int, use_utc: bool = True) -> str:
     return dt.strftime("%Y:%m:%d %H:%M:%S")
 
 
-def apply_exif_metadata(path: Path, ts: int, tagger_name: str = "") -> None:
-    """Write basic EXIF timestamps and tagger info to the downloaded photo."""
-    dt = exif_datetime_str(ts, use_utc=True)  # set False if you want local time
-    cmd = [
-        "exiftool",
-        "-overwrite_original",
-        f"-XMP:Subject+=tagged_by: {tagger_name}",
-        f"-DateTimeOriginal={dt}",
-        f"-CreateDate={dt}",
-        f"-ModifyDate={dt}",
-        str(path),
-    ]
-
-    subprocess.run(cmd, capture_output=True, text=True)
+class ExifWriteBatch:
+    """Buffer exiftool tag writes and flush them as a single batch invocation.
+
+    One exiftool process per photo pays the perl startup cost every time;
+    accumulating arg blocks and flushing through `exiftool -@ -` amortizes it
+    over hundreds of files.
+    """
+
+    def __init__(self, flush_every: int = 500) -> None:
+        self.flush_every = flush_every
+        self._lines: list[str] = []
+        self._pending = 0
+
+    def add(self, path: Path, ts: int, tagger_name: str | None = "") -> None:
+        """Queue EXIF timestamps and tagger info for one downloaded photo."""
+        dt = exif_datetime_str(ts, use_utc=True)  # set False if you want local time
+        self._lines += [
+            f"-XMP:Subject+=tagged_by: {tagger_name}",
+            f"-DateTimeOriginal={dt}",
+            f"-CreateDate={dt}",
+            f"-ModifyDate={dt}",
+            "-overwrite_original",
+            str(path),
+            "-execute",
+        ]
+        self._pending += 1
+
+    @property
+    def ready(self) -> bool:
+        return self._pending >= self.flush_every
+
+    def take(self) -> list[str]:
+        """Snapshot and clear the queued lines.
+
+        Must run on the event loop: once ready trips, every add() until the
+        buffer clears would dispatch another executor flush, and two flushes
+        swapping the same list double-apply the -XMP:Subject+= appends.
+        """
+        lines, self._lines, self._pending = self._lines, [], 0
+        return lines
+
+    def flush(self, lines: list[str] | None = None) -> None:
+        """Run queued writes (or a pre-taken snapshot) through one exiftool process."""
+        if lines is None:
+            lines = self.take()
+        if not lines:
+            return
+        subprocess.run(
+            ["exiftool", "-@", "-"],
+            input="\n".join(lines) + "\n",
+            capture_output=True,
+            text=True,
+        )
 
 
 def sanitize(name: str) -> str:
@@ -72,56 +111,126 @@ def get_tagger_name(item: dict) -> str | None:
     return None
 
 
-def extract_best_image_src(page) -> str | None:
-    """Try multiple selectors to locate the highest resolution image URL on the page."""
-    page.wait_for_timeout(1500)
+# Runs entirely in the page: tries each selector in order, picking the widest
+# image, then falls back to the longest fbcdn/scontent img src. Doing this in
+# one evaluate avoids a CDP round-trip per locator/attribute/naturalWidth.
+_BEST_IMAGE_JS = """(sels) => {
+  for (const s of sels) {
+    const els = [...document.querySelectorAll(s)];
+    if (els.length) {
+      let best = null, bw = -1;
+      for (const e of els.slice(0, 10)) {
+        const w = e.naturalWidth || 0;
+        if (e.src && w > bw) { bw = w; best = e.src; }
+      }
+      if (best) return best;
+    }
+  }
+  const all = [...document.querySelectorAll('img')]
+    .slice(0, 200)
+    .filter(e => /fbcdn|scontent/.test(e.src || ''));
+  all.sort((a, b) => b.src.length - a.src.length);
+  return all.length ? all[0].src : null;
+}"""
 
-    # Try selectors in order
-    for sel in CANDIDATE_SELECTORS:
-        els = page.locator(sel)
-        if els.count() > 0:
-            best = None
-            best_w = -1
-            for i in range(min(els.count(), 10)):
-                handle = els.nth(i)
-                try:
-                    src = handle.get_attribute("src")
-                    if not src:
-                        continue
-                    w = handle.evaluate("el => el.naturalWidth || 0")
-                    if w > best_w:
-                        best_w = w
-                        best = src
-                except Exception:
-                    continue
-            if best:
-                return best
-
-    # Fallback: search all img tags for fbcdn/scontent and pick longest src
-    imgs = page.locator("img")
-    best = None
-    for i in range(min(imgs.count(), 200)):
-        src = imgs.nth(i).get_attribute("src")
-        if not src:
-            continue
-        if "fbcdn" in src or "scontent" in src:
-            if best is None or len(src) > len(best):
-                best = src
-    return best
-
-
-def download(url: str, out_path: Path) -> None:
-    """Stream the image from Facebook CDN to disk."""
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Referer": "https://www.facebook.com/",
+
+async def extract_best_image_src(page) -> str | None:
+    """Locate the highest resolution image URL on the page in one JS call."""
+    await page.wait_for_timeout(1500)
+    return await page.evaluate(_BEST_IMAGE_JS, CANDIDATE_SELECTORS)
+
+
+# fbcdn URLs embed the variant size as /pWxH/ (or /sWxH/); swapping it asks
+# the CDN for a smaller pre-transcoded rendition.
+_CDN_SIZE_RE = re.compile(r"/[ps](\d+)x(\d+)/")
+
+
+def rewrite_cdn_url(url: str, max_width: int) -> str:
+    """Cap the requested CDN variant at max_width pixels; 0 keeps the original.
+
+    A 1080p rendition is a fraction of the bytes of the full-resolution
+    original, and downloads are bandwidth-bound.
+    """
+    if max_width <= 0:
+        return url
+
+    def _cap(m: re.Match) -> str:
+        if int(m.group(1)) <= max_width:
+            return m.group(0)
+        return f"/p{max_width}x{max_width}/"
+
+    return _CDN_SIZE_RE.sub(_cap, url)
+
+
+# Patterns for the main image URL in the raw photo-page HTML, tried in order.
+_IMG_SRC_PATTERNS = [
+    re.compile(r'"image":\{"uri":"([^"]+scontent[^"]+?)"'),
+    re.compile(r'<img[^>]+src="([^"]+fbcdn[^"]+?)"'),
+]
+
+
+def load_fb_cookies(state_file: Path) -> dict[str, str]:
+    """Extract facebook.com cookies from a Playwright storage state file."""
+    state = json.loads(state_file.read_text(encoding="utf-8"))
+    return {
+        c["name"]: c["value"]
+        for c in state.get("cookies", [])
+        if "facebook.com" in c.get("domain", "")
     }
-    with requests.get(url, stream=True, headers=headers, timeout=60) as r:
+
+
+async def fetch_img_src(session: aiohttp.ClientSession, page_url: str) -> str | None:
+    """Pull the image URL straight out of the photo page HTML.
+
+    A plain GET with the saved session cookies is orders of magnitude
+    cheaper than rendering the page in Chromium; the image URL sits in the
+    initial HTML payload for most photo pages.
+    """
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with session.get(page_url, timeout=timeout) as r:
+        r.raise_for_status()
+        html = await r.text()
+    for pat in _IMG_SRC_PATTERNS:
+        m = pat.search(html)
+        if m:
+            # JSON-embedded URLs carry \/ and \uXXXX escapes; unicode_escape
+            # leaves the JSON-only \/ intact, so strip it explicitly. The
+            # <img src> fallback needs &amp; entity unescaping instead.
+            url = m.group(1).encode().decode("unicode_escape")
+            return url.replace("\\/", "/").replace("&amp;", "&")
+    return None
+
+
+def make_cdn_session() -> aiohttp.ClientSession:
+    """Session for scontent/fbcdn downloads with a persistent connection pool.
+
+    Keeping connections alive across photos skips the TCP+TLS handshake per
+    image, which otherwise costs 100-300ms each on the CDN hosts.
+    """
+    connector = aiohttp.TCPConnector(limit=20, limit_per_host=10, keepalive_timeout=30)
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={
+            "User-Agent": "Mozilla/5.0",
+            "Referer": "https://www.facebook.com/",
+        },
+    )
+
+
+async def download(session: aiohttp.ClientSession, url: str, out_path: Path) -> None:
+    """Stream the image from Facebook CDN to disk."""
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with session.get(url, timeout=timeout) as r:
         r.raise_for_status()
         with open(out_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=1024 * 256):
-                if chunk:
-                    f.write(chunk)
+            # readany() hands back whatever the transport already buffered,
+            # so large images cross the interpreter in a few big writes
+            # instead of a fixed-size chunk loop.
+            while True:
+                chunk = await r.content.readany()
+                if not chunk:
+                    break
+                f.write(chunk)
 
 
 def load_items(path: Path):
@@ -142,14 +251,94 @@ def resolve_relative(root: Path, candidate: Path) -> Path:
     return candidate if candidate.is_absolute() else root / candidate
 
 
-def download_tagged_photos(
+async def _process_item(
+    idx: int,
+    item: dict,
+    get_src,
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    output_dir: Path,
+    batch: ExifWriteBatch,
+    max_width: int = 0,
+) -> bool:
+    """Fetch, download and tag one export entry; returns True on success."""
+    fbid = str(item.get("fbid") or item.get("id") or f"item{idx}")
+
+    ts = item.get("timestamp")
+    if ts is None:
+        print(f"[{idx}] SKIP (no timestamp) fbid={fbid}")
+        return False
+    ts = int(ts)
+
+    page_url = get_photo_page_url(item)
+    if not page_url:
+        print(f"[{idx}] SKIP (no URL) fbid={fbid}")
+        return False
+
+    out_name = sanitize(f"photo_{fbid}.jpg")
+    out_path = output_dir / out_name
+    if out_path.exists() and out_path.stat().st_size > 0:
+        print(f"[{idx}] EXISTS {out_path.name}")
+        return True
+
+    async with sem:
+        try:
+            print(f"[{idx}] Fetching page for fbid={fbid}")
+
+            img_src = None
+            try:
+                img_src = await get_src(page_url)
+            except PWTimeout:
+                print(f"   TIMEOUT loading page: {page_url}")
+                return False
+            except Exception as e:
+                print(f"   ERROR extracting img src: {e}")
+
+            if not img_src:
+                print("   FAIL: could not find image src (login expired? privacy? layout changed)")
+                return False
+
+            img_src = rewrite_cdn_url(img_src, max_width)
+            print(f"   Found img src: {img_src[:80]}...")
+            tagger_name = get_tagger_name(item)
+            try:
+                await download(session, img_src, out_path)
+                apply_file_times(out_path, ts)  # single syscall, fine per-file
+                batch.add(out_path, ts, tagger_name)
+                if batch.ready:
+                    # Snapshot on the event loop, then run the sync exiftool
+                    # subprocess off it with the immutable batch.
+                    lines = batch.take()
+                    await asyncio.get_running_loop().run_in_executor(None, batch.flush, lines)
+                print(f"   Saved -> {out_path}")
+                return True
+            except Exception as e:
+                print(f"   DOWNLOAD FAIL: {e}")
+                return False
+        finally:
+            await asyncio.sleep(0.5)
+
+
+async def download_tagged_photos(
     root: Path,
     json_path: Path,
     state_file: Path,
     output_dir: Path,
     headless: bool = True,
+    concurrency: int = 4,
+    use_browser: bool = False,
+    max_width: int = 0,
 ) -> None:
-    """Download tagged Facebook photos using a saved login session."""
+    """Download tagged Facebook photos using a saved login session.
+
+    Items are independent, so up to `concurrency` photos are in flight at
+    once: page loads, CDN downloads and exiftool writes all overlap instead
+    of paying the full per-photo latency serially.
+
+    By default photo pages are fetched with plain HTTP requests carrying the
+    saved cookies; pass use_browser=True to render them in Chromium when the
+    image URL is not present in the initial HTML.
+    """
     json_path = resolve_relative(root, json_path)
     state_file = resolve_relative(root, state_file)
     output_dir = resolve_relative(root, output_dir)
@@ -161,76 +350,53 @@ def download_tagged_photos(
     output_dir.mkdir(parents=True, exist_ok=True)
 
     items = load_items(json_path)
+    sem = asyncio.Semaphore(max(1, concurrency))
+    batch = ExifWriteBatch()
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
-        context = browser.new_context(storage_state=str(state_file))
-        page = context.new_page()
-
-        ok = 0
-        fail = 0
+    if use_browser:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=headless)
+            context = await browser.new_context(storage_state=str(state_file))
 
-        for idx, item in enumerate(items, 1):
-            fbid = str(item.get("fbid") or item.get("id") or f"item{idx}")
-
-            ts = item.get("timestamp")
-            if ts is None:
-                print(f"[{idx}] SKIP (no timestamp) fbid={fbid}")
-                fail += 1
-                continue
-            ts = int(ts)
-
-            page_url = get_photo_page_url(item)
-
-            if not page_url:
-                print(f"[{idx}] SKIP (no URL) fbid={fbid}")
-                fail += 1
-                continue
-
-            out_name = sanitize(f"photo_{fbid}.jpg")
-            out_path = output_dir / out_name
-            if out_path.exists() and out_path.stat().st_size > 0:
-                print(f"[{idx}] EXISTS {out_path.name}")
-                ok += 1
-                continue
-
-            print(f"[{idx}] Fetching page for fbid={fbid}")
-            try:
-                page.goto(page_url, wait_until="domcontentloaded", timeout=60000)
-            except PWTimeout:
-                print(f"   TIMEOUT loading page: {page_url}")
-                fail += 1
-                continue
-
-            page.wait_for_timeout(1200)
-
-            img_src = None
-            try:
-                img_src = extract_best_image_src(page)
-            except Exception as e:
-                print(f"   ERROR extracting img src: {e}")
-
-            if not img_src:
-                print("   FAIL: could not find image src (login expired? privacy? layout changed)")
-                fail += 1
-                continue
+            async def get_src(page_url: str) -> str | None:
+                page = await context.new_page()
+                try:
+                    await page.goto(page_url, wait_until="domcontentloaded", timeout=60000)
+                    await page.wait_for_timeout(1200)
+                    return await extract_best_image_src(page)
+                finally:
+                    await page.close()
 
-            print(f"   Found img src: {img_src[:80]}...")
-            tagger_name = get_tagger_name(item)
             try:
-                download(img_src, out_path)
-                apply_file_times(out_path, ts)
-                apply_exif_metadata(out_path, ts, tagger_name)
-                print(f"   Saved -> {out_path}")
-                ok += 1
-            except Exception as e:
-                print(f"   DOWNLOAD FAIL: {e}")
-                fail += 1
-
-            time.sleep(0.5)
-
-        browser.close()
-
+                async with make_cdn_session() as session:
+                    results = await asyncio.gather(*(
+                        _process_item(idx, item, get_src, session, sem, output_dir, batch, max_width)
+                        for idx, item in enumerate(items, 1)
+                    ))
+            finally:
+                batch.flush()
+                await browser.close()
+    else:
+        page_session = aiohttp.ClientSession(
+            headers={"User-Agent": "Mozilla/5.0"},
+            cookies=load_fb_cookies(state_file),
+        )
+
+        async def get_src(page_url: str) -> str | None:
+            return await fetch_img_src(page_session, page_url)
+
+        try:
+            async with make_cdn_session() as session:
+                results = await asyncio.gather(*(
+                    _process_item(idx, item, get_src, session, sem, output_dir, batch, max_width)
+                    for idx, item in enumerate(items, 1)
+                ))
+        finally:
+            batch.flush()
+            await page_session.close()
+
+    ok = sum(1 for r in results if r)
+    fail = len(results) - ok
     print(f"\nDone. ok={ok} fail={fail} output={output_dir.resolve()}")
 
 
@@ -269,9 +435,43 @@ def download_tagged_photos(
     show_default=True,
     help="Run Chromium headlessly while scraping photo pages.",
 )
-def main(root: Path, json_path: Path, state_file: Path, output_dir: Path, headless: bool) -> None:
+@click.option(
+    "--concurrency",
+    default=4,
+    show_default=True,
+    type=int,
+    help="Number of photos processed in parallel.",
+)
+@click.option(
+    "--use-browser",
+    is_flag=True,
+    help="Render photo pages in Chromium instead of fetching them directly.",
+)
+@click.option(
+    "--max-width",
+    default=0,
+    show_default=True,
+    type=int,
+    help="Request CDN variants no wider than this many pixels (0 = original size).",
+)
+def main(
+    root: Path,
+    json_path: Path,
+    state_file: Path,
+    output_dir: Path,
+    headless: bool,
+    concurrency: int,
+    use_browser: bool,
+    max_width: int,
+) -> None:
     """CLI entry point for downloading Facebook photos you were tagged in."""
-    download_tagged_photos(root, json_path, state_file, output_dir, headless=headless)
+    asyncio.run(
+        download_tagged_photos(
+            root, json_path, state_file, output_dir,
+            headless=headless, concurrency=concurrency, use_browser=use_browser,
+            max_width=max_width,
+        )
+    )
 
 
 if __name__ == "__main__":
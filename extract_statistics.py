@@ -19,14 +19,21 @@ Robustness:
 
 from __future__ import annotations
 
+import base64
 import json
+import multiprocessing
+import os
+import re
 import shutil
 import subprocess
+import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, Iterator, Optional
 
 import click
+import ijson
+import numpy as np
 import plotly.offline as pyo
 from dateutil import parser as dtparser
 
@@ -38,6 +45,10 @@ TAGS_TO_TRY = [
     "CreateDate",
 ]
 
+# Anything before 1990 is assumed to be a bogus timestamp (epoch defaults,
+# camera clock resets). Epoch ms, computed once at import.
+MIN_REASONABLE_MS = int(datetime(1990, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
 # Explicit list of media extensions we want to include (lowercase).
 MEDIA_EXTS = {
     ".jpg", ".jpeg", ".png", ".heic",
@@ -99,7 +110,15 @@ __PLOTLY_JS__
 
 <script>
 (function() {
-  const DATA = __DATA_JSON__; // epoch ms (UTC), sorted
+  // epoch ms (UTC), sorted; shipped as base64 little-endian float64 -- far
+  // smaller than a JSON array and decoded without JSON.parse
+  const DATA = (() => {
+    const bin = atob("__DATA_B64__");
+    const buf = new ArrayBuffer(bin.length);
+    const u8 = new Uint8Array(buf);
+    for (let i = 0; i < bin.length; i++) u8[i] = bin.charCodeAt(i);
+    return new Float64Array(buf);
+  })();
 
   const initial = {
     startMs: __MIN_MS__,
@@ -138,17 +157,28 @@ __PLOTLY_JS__
     return bins;
   }
 
-  function countIntoBins(edges) {
-    const counts = new Array(edges.length).fill(0);
-
-    // DATA sorted: single pass
-    let j = 0;
-    for (let i = 0; i < DATA.length; i++) {
-      const t = DATA[i];
-      if (t < view.startMs || t >= view.endMs) continue;
+  function lowerBound(arr, x) {
+    let lo = 0, hi = arr.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      if (arr[mid] < x) lo = mid + 1; else hi = mid;
+    }
+    return lo;
+  }
 
-      while (j < edges.length && t >= edges[j][1]) j++;
-      if (j < edges.length && t >= edges[j][0] && t < edges[j][1]) counts[j]++;
+  function countBins() {
+    // Bins are equal-width, so the bin index is a single division; DATA is
+    // sorted, so binary search bounds the scan to the in-range slice.
+    const n = view.bins;
+    const s = view.startMs, e = view.endMs;
+    const w = (e - s) / n;
+    const counts = new Int32Array(n);
+    const lo = lowerBound(DATA, s);
+    const hi = lowerBound(DATA, e);
+    for (let i = lo; i < hi; i++) {
+      let idx = ((DATA[i] - s) / w) | 0;
+      if (idx >= n) idx = n - 1;
+      counts[idx]++;
     }
     return counts;
   }
@@ -184,7 +214,7 @@ __PLOTLY_JS__
     const edges = buildBins(view);
     if (edges.length === 0) { setStatus("Bad range (no bins)."); return; }
 
-    const counts = countIntoBins(edges);
+    const counts = countBins();
 
     const mids = edges.map(([a,b]) => (a + b) / 2);
     const widths = edges.map(([a,b]) => (b - a));
@@ -235,7 +265,7 @@ __PLOTLY_JS__
 
   try {
     if (typeof Plotly === "undefined") throw new Error("Plotly is undefined.");
-    if (!Array.isArray(DATA)) throw new Error("DATA is not an array.");
+    if (!(DATA instanceof Float64Array)) throw new Error("DATA is not a Float64Array.");
     if (DATA.length === 0) { setStatus("No timestamps found (DATA empty)."); return; }
     if (__MAX_MS__ <= __MIN_MS__) { setStatus("All timestamps identical (or invalid range)."); return; }
     render();
@@ -273,19 +303,26 @@ def _parse_capture_datetime(s: str) -> Optional[datetime]:
 
     s = s.strip()
 
-    # Strict EXIF (no timezone)
-    try:
-        dt = datetime.strptime(s, "%Y:%m:%d %H:%M:%S")
-        return dt.replace(tzinfo=timezone.utc)
-    except ValueError:
-        pass
-
-    # EXIF with timezone offset like -04:00 or +01:00
-    try:
-        dt = datetime.strptime(s, "%Y:%m:%d %H:%M:%S%z")
-        return dt.astimezone(timezone.utc)
-    except ValueError:
-        pass
+    # EXIF dates always start "YYYY:"; a cheap shape check lets anything else
+    # skip straight to the dateutil fallback without paying for strptime.
+    # The character after the seconds discriminates the two layouts (absent =
+    # plain, +/-/Z = offset in any of its spellings: Z, +0100, +01:00), so
+    # the common path hits exactly one strptime attempt.
+    if len(s) >= 5 and s[:4].isdigit() and s[4] == ":":
+        if len(s) == 19:
+            # Strict EXIF (no timezone)
+            try:
+                dt = datetime.strptime(s, "%Y:%m:%d %H:%M:%S")
+                return dt.replace(tzinfo=timezone.utc)
+            except ValueError:
+                pass
+        elif len(s) > 19 and s[19] in "+-Z":
+            # EXIF with timezone suffix like Z, +0100 or -04:00
+            try:
+                dt = datetime.strptime(s, "%Y:%m:%d %H:%M:%S%z")
+                return dt.astimezone(timezone.utc)
+            except ValueError:
+                pass
 
     # Fallback: ISO-ish, etc.
     try:
@@ -299,85 +336,261 @@ def _parse_capture_datetime(s: str) -> Optional[datetime]:
     return dt.astimezone(timezone.utc)
 
 
-def _run_exiftool_json(input_dir: Path, exiftool_path: str) -> list[dict]:
-    if not shutil.which(exiftool_path):
-        raise RuntimeError(f"exiftool not found on PATH (looked for '{exiftool_path}').")
-
+def _base_exiftool_args(exiftool_path: str) -> list[str]:
     args: list[str] = [
         exiftool_path,
-        "-r",
         "-json",
         "-api", "LargeFileSupport=1",
         "-api", "QuickTimeUTC=1",     # improves video time interpretation (MOV/MP4)
         "-charset", "filename=utf8",
     ]
 
+    # Ask for all candidate tags (some files will only have video tags).
+    for t in TAGS_TO_TRY:
+        args.append(f"-{t}")
+
+    return args
+
+
+def _recursive_exiftool_args(exiftool_path: str) -> list[str]:
+    args = _base_exiftool_args(exiftool_path)
+    args.append("-r")
+
     # Only include real media extensions at the exiftool level.
     for ext in sorted(MEDIA_EXTS):
         args += ["-ext", ext.lstrip(".")]
 
-    # Ask for all candidate tags (some files will only have video tags).
-    for t in TAGS_TO_TRY:
-        args.append(f"-{t}")
+    return args
 
-    args.append(str(input_dir))
 
-    proc = subprocess.run(args, capture_output=True, text=True)
+def _exiftool_shard(job: tuple[str, list[str]]) -> list[dict]:
+    """Pool worker: run exiftool over one shard (a subdir or loose files)."""
+    exiftool_path, targets = job
+    proc = subprocess.run(
+        _recursive_exiftool_args(exiftool_path) + targets,
+        capture_output=True,
+        text=True,
+    )
     if proc.returncode != 0:
-        raise RuntimeError(f"exiftool failed (code {proc.returncode}).\nSTDERR:\n{proc.stderr}")
+        raise RuntimeError(
+            f"exiftool failed (code {proc.returncode}) on {targets[0]}:\n{proc.stderr.strip()}"
+        )
+    if not proc.stdout.strip():
+        return []
+    try:
+        return json.loads(proc.stdout)
+    except ValueError:
+        raise RuntimeError(
+            f"exiftool produced undecodable JSON on {targets[0]}:\n{proc.stderr.strip()}"
+        )
 
-    return json.loads(proc.stdout)
 
+def _run_exiftool_json(input_dir: Path, exiftool_path: str) -> Iterator[dict]:
+    """Yield exiftool JSON records one at a time.
 
-def _extract_timestamps_ms(records: list[dict]) -> list[int]:
-    out: list[int] = []
-    now_utc = datetime.now(timezone.utc)
-    max_reasonable = int((now_utc.timestamp() * 1000) + 366 * 86400_000)  # now + 1 year
-    min_reasonable_year = 1990
+    Trees with several top-level subdirectories are split across a process
+    pool, one exiftool per shard, which scales the read phase with cores
+    until storage bandwidth saturates. Small/flat trees keep the single
+    streaming exiftool whose stdout is parsed incrementally by ijson.
+    """
+    if not shutil.which(exiftool_path):
+        raise RuntimeError(f"exiftool not found on PATH (looked for '{exiftool_path}').")
 
-    for rec in records:
-        if not _is_media_sourcefile(rec):
-            continue
+    subdirs: list[str] = []
+    top_files: list[str] = []
+    for e in os.scandir(input_dir):
+        if e.is_dir(follow_symlinks=False):
+            subdirs.append(e.path)
+        elif e.is_file() and Path(e.name).suffix.lower() in MEDIA_EXTS:
+            top_files.append(e.path)
+
+    if len(subdirs) > 1:
+        jobs = [(exiftool_path, [d]) for d in subdirs]
+        if top_files:
+            jobs.append((exiftool_path, top_files))
+        workers = min(os.cpu_count() or 1, len(jobs))
+        with multiprocessing.Pool(workers) as pool:
+            for records in pool.imap_unordered(_exiftool_shard, jobs):
+                yield from records
+        return
+
+    args = _recursive_exiftool_args(exiftool_path)
+    args.append(str(input_dir))
 
-        raw_val = None
-        chosen_tag = None
-        for tag in TAGS_TO_TRY:
-            if tag in rec and rec.get(tag):
-                raw_val = rec.get(tag)
-                chosen_tag = tag
-                break
+    # stderr goes to a spooled file rather than a pipe so a chatty exiftool
+    # can't deadlock against our stdout consumption.
+    with tempfile.TemporaryFile() as errf:
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=errf, bufsize=1 << 20)
+        try:
+            yield from ijson.items(proc.stdout, "item")
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+            errf.seek(0)
+            stderr = errf.read().decode(errors="replace")
+    if returncode != 0:
+        raise RuntimeError(f"exiftool failed (code {returncode}).\n{stderr.strip()}")
+
+
+def _run_exiftool_json_cached(
+    input_dir: Path, exiftool_path: str, cache_file: Path
+) -> Iterator[dict]:
+    """Like _run_exiftool_json, but reuses tag reads for unchanged files.
+
+    The cache maps path -> [size, mtime_ns, tags]; files whose size and
+    mtime match the last run are served from it and only the changed or new
+    files are handed to exiftool, so reruns cost O(new files).
+    """
+    if not shutil.which(exiftool_path):
+        raise RuntimeError(f"exiftool not found on PATH (looked for '{exiftool_path}').")
 
-        if not raw_val:
-            continue
+    try:
+        cache: dict[str, list] = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cache = {}
+
+    to_query: list[str] = []
+    stats: dict[str, os.stat_result] = {}
+    for dirpath, _dirnames, filenames in os.walk(input_dir):
+        for name in filenames:
+            if Path(name).suffix.lower() not in MEDIA_EXTS:
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            ent = cache.get(path)
+            if ent and ent[0] == st.st_size and ent[1] == st.st_mtime_ns:
+                yield {"SourceFile": path, **ent[2]}
+            else:
+                to_query.append(path)
+                stats[path] = st
+
+    if to_query:
+        args = _base_exiftool_args(exiftool_path)
+        for start in range(0, len(to_query), 1000):
+            chunk = to_query[start:start + 1000]
+            proc = subprocess.run(args + chunk, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(
+                    f"exiftool failed (code {proc.returncode}) on {chunk[0]}:\n{proc.stderr.strip()}"
+                )
+            if not proc.stdout.strip():
+                continue
+            try:
+                records = json.loads(proc.stdout)
+            except ValueError:
+                raise RuntimeError(
+                    f"exiftool produced undecodable JSON on {chunk[0]}:\n{proc.stderr.strip()}"
+                )
+            for rec in records:
+                src = rec.get("SourceFile")
+                st = stats.get(src)
+                if st is not None:
+                    tags = {t: rec[t] for t in TAGS_TO_TRY if t in rec}
+                    cache[src] = [st.st_size, st.st_mtime_ns, tags]
+                yield rec
+
+    # Atomic write-then-rename so a crash can't truncate the cache.
+    tmp = cache_file.with_suffix(cache_file.suffix + ".tmp")
+    tmp.write_text(json.dumps(cache), encoding="utf-8")
+    os.replace(tmp, cache_file)
+
+
+def _is_plain_exif_str(s: str) -> bool:
+    """True for exactly the strict 'YYYY:MM:DD HH:MM:SS' shape."""
+    return (
+        len(s) == 19
+        and s[4] == ":" and s[7] == ":" and s[10] == " "
+        and s[13] == ":" and s[16] == ":"
+        and s[:4].isdigit() and s[5:7].isdigit() and s[8:10].isdigit()
+        and s[11:13].isdigit() and s[14:16].isdigit() and s[17:19].isdigit()
+    )
 
-        candidates: Iterable[str]
-        if isinstance(raw_val, list):
-            candidates = (str(x) for x in raw_val if x)
-        else:
-            candidates = (str(raw_val),)
 
+def _fast_exif_to_ms(raw: list[str]) -> Optional[np.ndarray]:
+    """Vectorized parse of strict EXIF strings to epoch ms; None on failure."""
+    arr = np.array(raw, dtype="U19")
+    # "YYYY:MM:DD HH:MM:SS" -> "YYYY-MM-DDTHH:MM:SS" for datetime64
+    iso = np.char.replace(arr, ":", "-", count=2)
+    iso = np.char.replace(iso, " ", "T")
+    try:
+        return iso.astype("datetime64[ms]").astype(np.int64)
+    except ValueError:
+        # Some string passed the shape check but not calendar validation
+        # (e.g. month 13); let the caller fall back to the slow parser.
+        return None
+
+
+def _extract_timestamps_ms(records: Iterable[dict]) -> list[int]:
+    out: list[int] = []
+    fast_raw: list[str] = []
+    now_utc = datetime.now(timezone.utc)
+    max_reasonable = int((now_utc.timestamp() * 1000) + 366 * 86400_000)  # now + 1 year
+    min_reasonable = MIN_REASONABLE_MS
+
+    def slow_parse(cands: Iterable[str]) -> None:
         dt = None
-        for c in candidates:
+        for c in cands:
             dt = _parse_capture_datetime(c)
             if dt:
                 break
-
         if not dt:
+            return
+        ms = int(dt.timestamp() * 1000)
+        if min_reasonable <= ms <= max_reasonable:
+            out.append(ms)
+
+    # Local bindings and a chained get keep the per-record tag lookup at one
+    # hash probe per tag instead of the `in` + `.get` double lookup.
+    _get = dict.get
+    tag0, tag1, tag2, tag3 = TAGS_TO_TRY
+
+    for rec in records:
+        if not _is_media_sourcefile(rec):
             continue
 
-        if dt.year < min_reasonable_year:
+        raw_val = (
+            _get(rec, tag0) or _get(rec, tag1) or _get(rec, tag2) or _get(rec, tag3)
+        )
+        if not raw_val:
             continue
 
-        ms = int(dt.timestamp() * 1000)
-        if ms > max_reasonable:
+        candidates: list[str]
+        if isinstance(raw_val, list):
+            candidates = [str(x) for x in raw_val if x]
+        else:
+            candidates = [str(raw_val)]
+        if not candidates:
             continue
 
-        out.append(ms)
+        # The overwhelmingly common case is a plain EXIF string; batch those
+        # for a vectorized datetime64 conversion and keep the per-string
+        # parser only for the oddballs (timezone suffixes, ISO formats).
+        first = candidates[0].strip()
+        if _is_plain_exif_str(first):
+            fast_raw.append(first)
+        else:
+            slow_parse(candidates)
+
+    if fast_raw:
+        ms_arr = _fast_exif_to_ms(fast_raw)
+        if ms_arr is None:
+            for s in fast_raw:
+                slow_parse((s,))
+        else:
+            mask = (ms_arr >= min_reasonable) & (ms_arr <= max_reasonable)
+            out.extend(int(x) for x in ms_arr[mask])
 
     out.sort()
     return out
 
 
+# Template placeholders, substituted in a single pass over the HTML.
+_PLACEHOLDER_RE = re.compile(r"__(PLOTLY_JS|DATA_B64|MIN_MS|MAX_MS)__")
+
+
 def _write_html(output_path: Path, timestamps_ms: list[int]) -> None:
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -388,13 +601,20 @@ def _write_html(output_path: Path, timestamps_ms: list[int]) -> None:
     if max_ms <= min_ms:
         max_ms = min_ms + 1
 
-    html = (
-        HTML_TEMPLATE
-        .replace("__PLOTLY_JS__", plotly_js)
-        .replace("__DATA_JSON__", json.dumps(timestamps_ms, separators=(",", ":")))
-        .replace("__MIN_MS__", str(min_ms))
-        .replace("__MAX_MS__", str(max_ms))
-    )
+    # One regex pass instead of four sequential .replace() scans; with
+    # plotly.js embedded the template is multi-MB, so each extra scan is a
+    # full copy of the document.
+    data_b64 = base64.b64encode(
+        np.asarray(timestamps_ms, dtype="<f8").tobytes()
+    ).decode("ascii")
+
+    values = {
+        "PLOTLY_JS": plotly_js,
+        "DATA_B64": data_b64,
+        "MIN_MS": str(min_ms),
+        "MAX_MS": str(max_ms),
+    }
+    html = _PLACEHOLDER_RE.sub(lambda m: values[m.group(1)], HTML_TEMPLATE)
 
     output_path.write_text(html, encoding="utf-8")
 
@@ -403,10 +623,19 @@ def _write_html(output_path: Path, timestamps_ms: list[int]) -> None:
 @click.option("--input-dir", type=click.Path(exists=True, file_okay=False, path_type=Path), required=True)
 @click.option("--output-dir", type=click.Path(file_okay=False, path_type=Path), required=True)
 @click.option("--exiftool", "exiftool_path", default="exiftool", show_default=True)
-def main(input_dir: Path, output_dir: Path, exiftool_path: str) -> None:
+@click.option(
+    "--cache-file",
+    type=click.Path(path_type=Path),
+    default=None,
+    help="JSON cache of tag reads keyed by (path, size, mtime); makes reruns skip unchanged files.",
+)
+def main(input_dir: Path, output_dir: Path, exiftool_path: str, cache_file: Path | None) -> None:
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    records = _run_exiftool_json(input_dir, exiftool_path)
+    if cache_file is not None:
+        records = _run_exiftool_json_cached(input_dir, exiftool_path, cache_file)
+    else:
+        records = _run_exiftool_json(input_dir, exiftool_path)
     timestamps_ms = _extract_timestamps_ms(records)
 
     if not timestamps_ms:
@@ -11,46 +11,174 @@ Usage options:
 By default the script looks for entries with a "uri" and "creation_timestamp".
 Override with --uri-key/--timestamp-key if your JSON uses different keys.
 """
+import argparse
+import functools
 import json
 import os
 import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime, timezone
 from typing import Iterable, Iterator, Sequence
 
-import click
+import ijson
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    # stdlib json accepts bytes directly; just slower
+    _loads = json.loads
 
 DEFAULT_TIMESTAMP_KEYS = ["creation_timestamp", "timestamp", "taken_at", "taken_time"]
 
 
+@functools.lru_cache(maxsize=8192)
 def exif_dt_from_unix(ts: int) -> str:
-    """ExifTool date format: 'YYYY:MM:DD HH:MM:SS' (UTC)."""
-    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime("%Y:%m:%d %H:%M:%S")
-
-
-def run_exiftool(path: Path, exif_dt: str) -> None:
-    """Write EXIF timestamps for DateTimeOriginal/CreateDate/ModifyDate using exiftool."""
-    # -overwrite_original: don't keep _original backups
-    # -P: preserve filesystem timestamps that exiftool might otherwise change
-    cmd = [
-        "exiftool",
-        "-overwrite_original",
-        "-P",
-        f"-DateTimeOriginal={exif_dt}",
-        f"-CreateDate={exif_dt}",
-        f"-ModifyDate={exif_dt}",
-        str(path),
-    ]
-    res = subprocess.run(cmd, capture_output=True, text=True)
-    if res.returncode != 0:
-        raise RuntimeError(f"exiftool failed for {path}\nSTDOUT:\n{res.stdout}\nSTDERR:\n{res.stderr}")
-
-
-def set_file_times(path: Path, ts: int) -> None:
+    """ExifTool date format: 'YYYY:MM:DD HH:MM:SS' (UTC).
+
+    time.gmtime plus f-string formatting skips the datetime allocation
+    and locale-aware strftime parse; cached on top of that because
+    album-level timestamps repeat across many entries.
+    """
+    t = time.gmtime(int(ts))
+    return f"{t.tm_year:04d}:{t.tm_mon:02d}:{t.tm_mday:02d} {t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}"
+
+
+# How many files to hand exiftool per argfile run.
+EXIF_BATCH_SIZE = 500
+
+
+def _write_exif_chunk(chunk: Sequence[tuple[str, str]]) -> set[str]:
+    """Write one chunk of EXIF fixes via a single argfile run.
+
+    Each file gets its own -execute block so one bad file doesn't abort
+    the rest. Returns the set of paths (as strings) that exiftool
+    reported an error for.
+    """
+    lines: list[str] = []
+    for path, exif_dt in chunk:
+        # -overwrite_original: don't keep _original backups
+        # -fast2: skip maker-note scanning, we only touch a few tags
+        # -q -m: drop informational output and minor warnings, keep errors
+        # no -P: set_file_times overwrites filesystem timestamps afterwards anyway
+        lines += [
+            "-overwrite_original",
+            "-fast2",
+            "-q",
+            "-m",
+            "-api",
+            "QuickTimeUTC=1",
+            f"-DateTimeOriginal={exif_dt}",
+            f"-CreateDate={exif_dt}",
+            f"-ModifyDate={exif_dt}",
+            path,
+            "-execute",
+        ]
+    proc = subprocess.run(
+        ["exiftool", "-@", "-"],
+        input="\n".join(lines) + "\n",
+        text=True,
+        capture_output=True,
+    )
+    # exiftool reports per-file problems as "Error: <reason> - <path>"
+    failed: set[str] = set()
+    for line in (proc.stdout + proc.stderr).splitlines():
+        if line.startswith("Error"):
+            _, _, path_part = line.partition(" - ")
+            if path_part:
+                failed.add(path_part.strip())
+    return failed
+
+
+def _read_dt_chunk(chunk: Sequence[str]) -> dict[str, str]:
+    """Current DateTimeOriginal per path from one exiftool -j argfile run."""
+    lines = ["-j", "-DateTimeOriginal", "-fast2"] + list(chunk)
+    proc = subprocess.run(
+        ["exiftool", "-@", "-"],
+        input="\n".join(lines) + "\n",
+        text=True,
+        capture_output=True,
+    )
+    current: dict[str, str] = {}
+    try:
+        records = json.loads(proc.stdout)
+    except ValueError:
+        return current
+    for rec in records:
+        src = rec.get("SourceFile")
+        dt = rec.get("DateTimeOriginal")
+        if src and dt:
+            current[src] = str(dt)
+    return current
+
+
+def read_current_dts(paths: Sequence[str], jobs: int = 1) -> dict[str, str]:
+    """Read DateTimeOriginal for many files in chunked (optionally parallel) runs."""
+    chunks = [paths[start:start + EXIF_BATCH_SIZE] for start in range(0, len(paths), EXIF_BATCH_SIZE)]
+    current: dict[str, str] = {}
+    if jobs <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            current.update(_read_dt_chunk(chunk))
+        return current
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for chunk_current in pool.map(_read_dt_chunk, chunks):
+            current.update(chunk_current)
+    return current
+
+
+def write_exif_batch(fixes: Sequence[tuple[str, str]], jobs: int = 1) -> set[str]:
+    """Write EXIF timestamps for many files in chunked argfile runs.
+
+    One exiftool invocation per EXIF_BATCH_SIZE files amortizes the perl
+    startup over the whole chunk; with jobs > 1 the chunks run in parallel
+    exiftool processes (threads suffice -- each worker just waits on its
+    subprocess). Returns the set of paths exiftool reported an error for.
+    """
+    chunks = [fixes[start:start + EXIF_BATCH_SIZE] for start in range(0, len(fixes), EXIF_BATCH_SIZE)]
+    failed: set[str] = set()
+    if jobs <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            failed |= _write_exif_chunk(chunk)
+        return failed
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for chunk_failed in pool.map(_write_exif_chunk, chunks):
+            failed |= chunk_failed
+    return failed
+
+
+def set_file_times(path: str, ts: int) -> None:
     """Set filesystem atime/mtime to the provided unix timestamp."""
     os.utime(path, (ts, ts))
 
 
+def set_file_times_batch(items: Sequence[tuple[str, int]], jobs: int = 1) -> dict[str, str]:
+    """Apply filesystem timestamps for many files; returns {path: error}.
+
+    The stdlib offers no batched syscall submission, so the utimensat
+    calls are overlapped across worker threads instead -- the per-call
+    latency (dominant on network filesystems) is what batching would
+    have hidden anyway.
+    """
+
+    def one(item: tuple[str, int]) -> tuple[str, str] | None:
+        path, ts = item
+        try:
+            set_file_times(path, ts)
+        except OSError as e:
+            return path, str(e)
+        return None
+
+    if jobs <= 1 or len(items) <= 1:
+        results = map(one, items)
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(one, items))
+    return dict(res for res in results if res is not None)
+
+
 def require_exiftool() -> None:
     """Exit with a helpful message if exiftool is not available."""
     try:
@@ -59,11 +187,47 @@ def require_exiftool() -> None:
         raise SystemExit("exiftool not found. Install it first (e.g., `brew install exiftool`).")
 
 
+def collect_existing_files(root: Path) -> dict[str, int]:
+    """Map of absolute path -> int(st_mtime) for every file under root.
+
+    One readdir-driven scandir walk answers both questions the main loop
+    has about a file -- does it exist, and does its mtime already match
+    the target timestamp -- without any per-entry stat calls.
+    """
+    existing: dict[str, int] = {}
+    stack = [str(root)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        existing[entry.path] = int(entry.stat(follow_symlinks=False).st_mtime)
+                except OSError:
+                    continue
+    return existing
+
+
 def iter_json_files(target: Path) -> list[Path]:
-    """Return a sorted list of JSON files under a file or directory target."""
+    """Return a sorted list of JSON files under a file or directory target.
+
+    os.walk already separates files from directories, so a suffix check
+    replaces rglob's per-path glob matching, Path construction and
+    is_file() stat for the thousands of media files sharing the tree.
+    """
     if target.is_file():
         return [target]
-    return sorted(p for p in target.rglob("*.json") if p.is_file())
+    results = []
+    for dirpath, _dirnames, filenames in os.walk(str(target)):
+        for name in filenames:
+            if name.endswith(".json"):
+                results.append(Path(os.path.join(dirpath, name)))
+    return sorted(results)
 
 
 def get_by_dotted_path(doc: dict, dotted_path: str):
@@ -79,39 +243,73 @@ def get_by_dotted_path(doc: dict, dotted_path: str):
 
 
 def discover_iterables(doc, uri_key: str, timestamp_keys: Sequence[str]) -> list[tuple[str, list]]:
-    """Return list of (path, iterable) where iterable contains dicts with uri/timestamp."""
-    paths: list[tuple[str, list]] = []
+    """Return list of (path, iterable) where iterable contains dicts with uri/timestamp.
 
-    def walk(node, path_parts: list[str]) -> None:
+    Walks iteratively with an explicit stack (deep exports can't blow the
+    recursion limit) and checks uri and timestamp presence in the same pass
+    that queues children, instead of re-scanning every list twice.
+    """
+    primary, rest = timestamp_keys[0], timestamp_keys[1:]
+    found: list[tuple[str, list]] = []
+    stack: list[tuple[object, tuple[str, ...]]] = [(doc, ())]
+    while stack:
+        node, path = stack.pop()
         if isinstance(node, list):
-            if any(isinstance(item, dict) and uri_key in item for item in node):
-                paths.append((".".join(path_parts) or "$", node))
+            has_uri = has_ts = False
             for item in node:
-                walk(item, path_parts)
+                if isinstance(item, dict):
+                    if uri_key in item:
+                        has_uri = True
+                    if not has_ts and extract_timestamp(item, primary, rest) is not None:
+                        has_ts = True
+                    stack.append((item, path))
+                elif isinstance(item, list):
+                    stack.append((item, path))
+            if has_uri and has_ts:
+                found.append((".".join(path) or "$", node))
         elif isinstance(node, dict):
             for k, v in node.items():
-                walk(v, path_parts + [k])
+                if isinstance(v, (dict, list)):
+                    stack.append((v, path + (k,)))
+    return found
 
-    walk(doc, [])
-    # Keep only paths where at least one timestamp is present
-    filtered = []
-    for p, items in paths:
-        if any(isinstance(item, dict) and extract_timestamp(item, timestamp_keys) is not None for item in items):
-            filtered.append((p, items))
-    return filtered
 
+def extract_timestamp(entry: dict, primary: str, rest: Sequence[str]) -> int | None:
+    """Pull the first usable timestamp, trying the primary key inline first.
 
-def extract_timestamp(entry: dict, timestamp_keys: Sequence[str]) -> int | None:
-    """Pull the first usable timestamp value from the provided key order."""
-    for key in timestamp_keys:
-        if key in entry and entry[key] is not None:
+    Almost every entry carries only the primary key, so the hot path is
+    one dict lookup and an int(); the fallback loop only runs when the
+    primary is absent or unusable.
+    """
+    value = entry.get(primary)
+    if value is not None:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            pass
+    for key in rest:
+        value = entry.get(key)
+        if value is not None:
             try:
-                return int(entry[key])
+                return int(value)
             except (TypeError, ValueError):
                 continue
     return None
 
 
+# Discovered dotted paths memoized by top-level schema fingerprint, so the
+# many files of a same-shaped export (your_posts_1.json, your_posts_2.json,
+# ...) only pay for the full tree walk once.
+_SCHEMA_CACHE: dict[tuple, list[str]] = {}
+
+
+def _schema_fingerprint(doc) -> tuple | None:
+    """Cheap schema key for a top-level dict: sorted (key, value type) pairs."""
+    if not isinstance(doc, dict):
+        return None
+    return tuple(sorted((k, type(v).__name__) for k, v in doc.items()))
+
+
 def iter_entries(doc: dict, uri_key: str, timestamp_keys: Sequence[str], entry_path: str | None):
     """
     Yield (dotted_path, iterable) pairs either from a user-specified path or by
@@ -127,8 +325,22 @@ def iter_entries(doc: dict, uri_key: str, timestamp_keys: Sequence[str], entry_p
         yield entry_path, iterable
         return
 
+    fingerprint = _schema_fingerprint(doc)
+    if fingerprint is not None and fingerprint in _SCHEMA_CACHE:
+        cached = []
+        try:
+            for path in _SCHEMA_CACHE[fingerprint]:
+                cached.append((path, get_by_dotted_path(doc, path)))
+        except KeyError:
+            cached = None
+        if cached is not None and all(isinstance(it, list) for _, it in cached):
+            yield from cached
+            return
+
     discovered = discover_iterables(doc, uri_key, timestamp_keys)
     if discovered:
+        if fingerprint is not None:
+            _SCHEMA_CACHE[fingerprint] = [path for path, _ in discovered]
         for path, iterable in discovered:
             yield path, iterable
         return
@@ -136,99 +348,170 @@ def iter_entries(doc: dict, uri_key: str, timestamp_keys: Sequence[str], entry_p
     raise ValueError("Could not find any iterable containing items with a URI and timestamp")
 
 
-@click.command()
-@click.argument(
-    "path",
-    type=click.Path(path_type=Path, exists=True, readable=True),
-    metavar="PATH",
-)
-@click.option(
-    "--root",
-    type=click.Path(path_type=Path, file_okay=False),
-    default=".",
-    show_default=True,
-    help="Root directory to resolve relative URIs from the JSON.",
-)
-@click.option(
-    "--entry-path",
-    help="Dotted path to the iterable within the JSON (e.g., 'videos_v2' or 'albums.items').",
-)
-@click.option(
-    "--uri-key",
-    default="uri",
-    show_default=True,
-    help="Key name that stores the media URI in each entry.",
-)
-@click.option(
-    "--timestamp-key",
-    default="creation_timestamp",
-    show_default=True,
-    help="Primary key name for the timestamp in each entry.",
-)
-def main(path: Path, root: Path, entry_path: str | None, uri_key: str, timestamp_key: str):
+def main():
     """
     Update EXIF and filesystem timestamps for media referenced in Facebook export JSON files.
 
     PATH may be a single JSON file or a directory containing JSON files (searched recursively).
     """
+    ap = argparse.ArgumentParser(
+        description="Update EXIF and filesystem timestamps for media referenced in Facebook export JSON files."
+    )
+    ap.add_argument("path", type=Path, metavar="PATH",
+                    help="JSON file or directory containing JSON files (searched recursively)")
+    ap.add_argument("--root", type=Path, default=Path("."),
+                    help="Root directory to resolve relative URIs from the JSON (default: current dir)")
+    ap.add_argument("--entry-path",
+                    help="Dotted path to the iterable within the JSON (e.g., 'videos_v2' or 'albums.items')")
+    ap.add_argument("--uri-key", default="uri",
+                    help="Key name that stores the media URI in each entry (default: %(default)s)")
+    ap.add_argument("--timestamp-key", default="creation_timestamp",
+                    help="Primary key name for the timestamp in each entry (default: %(default)s)")
+    ap.add_argument("--jobs", type=int, default=min(4, os.cpu_count() or 1),
+                    help="Number of exiftool batches to run in parallel (default: %(default)s)")
+    ap.add_argument("--skip-if-set", action="store_true",
+                    help="Read current DateTimeOriginal first and only write files that differ")
+    ap.add_argument("-q", "--quiet", action="store_true",
+                    help="Don't print per-file [OK]/[SKIP] lines")
+    args = ap.parse_args()
+
+    path: Path = args.path
+    entry_path: str | None = args.entry_path
+    uri_key: str = args.uri_key
+    jobs: int = args.jobs
+    skip_if_set: bool = args.skip_if_set
+    quiet: bool = args.quiet
+
+    if not path.exists():
+        raise SystemExit(f"Path does not exist: {path}")
+
     require_exiftool()
 
-    timestamp_keys = [timestamp_key] + [k for k in DEFAULT_TIMESTAMP_KEYS if k != timestamp_key]
+    timestamp_keys = [args.timestamp_key] + [k for k in DEFAULT_TIMESTAMP_KEYS if k != args.timestamp_key]
 
-    root = root.expanduser().resolve()
+    root = args.root.expanduser().resolve()
     json_files = iter_json_files(path.expanduser().resolve())
     if not json_files:
         raise SystemExit(f"No JSON files found under {path}")
 
-    total = updated = missing = errors = 0
+    total = updated = skipped = missing = errors = 0
+
+    existing = collect_existing_files(root)
+    root_str = str(root)
+
+    # Per-line print flushes stdout every time; buffering the log lines
+    # and writing them 256 at a time keeps the hot loops off the syscall
+    # boundary (and out of contention with the worker threads).
+    log_buf: list[str] = []
+
+    def log(line: str) -> None:
+        log_buf.append(line)
+        if len(log_buf) >= 256:
+            sys.stdout.write("\n".join(log_buf) + "\n")
+            log_buf.clear()
+
+    # Scan phase: resolve every (path, timestamp) pair before touching exiftool.
+    ts_primary, ts_rest = timestamp_keys[0], timestamp_keys[1:]
+    fixes: list[tuple[str, int, str, str]] = []
+
+    def handle_entry(entry, detected_path: str) -> None:
+        nonlocal total, skipped, missing
+        if not isinstance(entry, dict):
+            return
+        uri = entry.get(uri_key)
+        ts = extract_timestamp(entry, ts_primary, ts_rest)
+        if not uri or ts is None:
+            return
+
+        total += 1
+        media_path = os.path.normpath(os.path.join(root_str, uri))
+
+        mtime = existing.get(media_path)
+        if mtime is None:
+            log(f"[MISSING] {media_path}")
+            missing += 1
+            return
+        if mtime == int(ts):
+            # A previous run already stamped this file; both writes would
+            # be no-ops.
+            if not quiet:
+                log(f"[SKIP] {media_path} mtime already matches")
+            skipped += 1
+            return
+
+        fixes.append((media_path, int(ts), exif_dt_from_unix(ts), detected_path))
 
     for jf in json_files:
+        if entry_path:
+            # With an explicit entry path there is no need to hold the whole
+            # document; messages/inbox files can run to hundreds of MB, so
+            # stream one entry at a time instead.
+            try:
+                with open(jf, "rb") as fh:
+                    for entry in ijson.items(fh, f"{entry_path}.item"):
+                        handle_entry(entry, entry_path)
+            except Exception as e:
+                log(f"[ERROR] {jf}: {e}")
+                errors += 1
+            continue
+
         try:
-            doc = json.loads(jf.read_text(encoding="utf-8"))
+            doc = _loads(jf.read_bytes())
         except Exception as e:
-            print(f"[ERROR] Could not parse JSON: {jf} ({e})")
+            log(f"[ERROR] Could not parse JSON: {jf} ({e})")
             errors += 1
             continue
 
         try:
-            entry_sets = list(iter_entries(doc, uri_key, timestamp_keys, entry_path))
+            entry_sets = list(iter_entries(doc, uri_key, timestamp_keys, None))
         except ValueError as e:
-            print(f"[ERROR] {jf}: {e}")
+            log(f"[ERROR] {jf}: {e}")
             errors += 1
             continue
 
         for detected_path, iterable in entry_sets:
             for entry in iterable:
-                if not isinstance(entry, dict):
-                    continue
-                uri = entry.get(uri_key)
-                ts = extract_timestamp(entry, timestamp_keys)
-                if not uri or ts is None:
-                    continue
-
-                total += 1
-                media_path = (root / uri).resolve()
-
-                if not media_path.exists():
-                    print(f"[MISSING] {media_path}")
-                    missing += 1
-                    continue
-
-                exif_dt = exif_dt_from_unix(ts)
+                handle_entry(entry, detected_path)
+
+    # On re-runs most files already carry the right timestamp; a batched
+    # read pass lets us write only the ones that differ.
+    skip: set[str] = set()
+    if skip_if_set and fixes:
+        current = read_current_dts([p for p, _ts, _dt, _dp in fixes], jobs=jobs)
+        skip = {p for p, _ts, exif_dt, _dp in fixes if current.get(p) == exif_dt}
+
+    # Write phase: all EXIF updates batched, then filesystem times for successes.
+    to_write = [(p, exif_dt) for p, _ts, exif_dt, _dp in fixes if p not in skip]
+    failed = write_exif_batch(to_write, jobs=jobs)
+    utime_errors = set_file_times_batch(
+        [(p, ts) for p, ts, _dt, _dp in fixes if p not in skip and p not in failed],
+        jobs=jobs,
+    )
+    for media_path, ts, exif_dt, detected_path in fixes:
+        if media_path in skip:
+            if not quiet:
+                log(f"[SKIP] {media_path} already at {exif_dt}Z")
+            skipped += 1
+        elif media_path in failed:
+            log(f"[ERROR] {media_path}: exiftool reported an error")
+            errors += 1
+        elif media_path in utime_errors:
+            log(f"[ERROR] {media_path}: {utime_errors[media_path]}")
+            errors += 1
+        else:
+            updated += 1
+            if not quiet:
+                log(f"[OK] {media_path}  ->  {exif_dt}Z (path: {detected_path})")
 
-                try:
-                    run_exiftool(media_path, exif_dt)
-                    set_file_times(media_path, int(ts))
-                    updated += 1
-                    print(f"[OK] {media_path}  ->  {exif_dt}Z (path: {detected_path})")
-                except Exception as e:
-                    print(f"[ERROR] {media_path}: {e}")
-                    errors += 1
+    if log_buf:
+        sys.stdout.write("\n".join(log_buf) + "\n")
+        log_buf.clear()
 
     print("\nSummary")
     print(f"  JSON files : {len(json_files)}")
     print(f"  Entries    : {total}")
     print(f"  Updated    : {updated}")
+    print(f"  Skipped    : {skipped}")
     print(f"  Missing    : {missing}")
     print(f"  Errors     : {errors}")
 
@@ -1,36 +1,52 @@
 #!/usr/bin/env python3
 import json, subprocess, unicodedata
+from bisect import bisect_left
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime, timezone
 import re
 
-IMAGE_EXTS = {".mov", ".mp4", ".jpg", ".jpeg", ".png", ".heic"}
+from exiftool import ExifToolHelper
+
+IMAGE_EXTS = (".mov", ".mp4", ".jpg", ".jpeg", ".png", ".heic")
+
+_STRIP_NUM = re.compile(r'_\d+_$')
+_STRIP_MOD = re.compile(r'-modifie$')
 
 def norm(s: str) -> str:
     """Normalize strings for comparison by NFC and replace non-breaking spaces."""
     return unicodedata.normalize("NFC", s.replace("\u00A0", " "))
 
-def exif_missing(img: Path) -> bool:
+def exif_missing(img: Path, et: ExifToolHelper) -> bool:
     """Return True if DateTimeOriginal tag is absent on the media file."""
-    r = subprocess.run(
-        ["exiftool", "-DateTimeOriginal", "-s", "-s", "-s", str(img)],
-        capture_output=True, text=True
-    )
-    return not r.stdout.strip()
+    try:
+        tags = et.get_tags([str(img)], ["DateTimeOriginal"])[0]
+    except Exception:
+        return False
+    return not any(k.endswith("DateTimeOriginal") and v for k, v in tags.items())
+
+@lru_cache(maxsize=4096)
+def _dir_json_index(d: Path) -> tuple[tuple[str, Path], ...]:
+    """Sorted (normalized stem, path) pairs for a directory's JSON sidecars,
+    built once per run instead of one glob + linear scan per image."""
+    return tuple(sorted((norm(j.stem), j) for j in d.glob("*.json")))
 
 def find_json(img: Path):
     """Find a nearby JSON sidecar whose stem matches the image stem after normalization."""
     base = norm(img.stem)
 
     # strip trailing _#_ (one or more digits)
-    base = re.sub(r'_\d+_$', '', base)
+    base = _STRIP_NUM.sub('', base)
 
     # strip trailing "modifie"
-    base = re.sub(r'-modifie$', '', base)
+    base = _STRIP_MOD.sub('', base)
 
-    for j in img.parent.glob("*.json"):
-        if norm(j.stem).startswith(base):
-            return j
+    # Stems sharing the prefix form a contiguous sorted range; the lower
+    # bound is the first possible match.
+    index = _dir_json_index(img.parent)
+    i = bisect_left(index, (base,))
+    if i < len(index) and index[i][0].startswith(base):
+        return index[i][1]
     return None
 
 def extract_ts(jpath: Path):
@@ -44,33 +60,47 @@ def extract_ts(jpath: Path):
     except KeyError:
         return None
 
-def write_exif(img: Path, dt: str):
-    """Write DateTimeOriginal to the target image using exiftool."""
-    subprocess.run([
-        "exiftool", "-overwrite_original",
-        f"-DateTimeOriginal={dt}",
-        "-d", "%Y:%m:%d %H:%M:%S",
-        str(img)
-    ])
+def write_exif_batch(fixes: list[tuple[Path, str]]):
+    """Write all collected DateTimeOriginal fixes in one exiftool run.
+
+    An argfile on stdin amortizes the perl startup over the whole batch.
+    """
+    if not fixes:
+        return
+    lines = []
+    for img, dt in fixes:
+        lines += ["-overwrite_original", f"-DateTimeOriginal={dt}", str(img), "-execute"]
+    subprocess.run(
+        ["exiftool", "-@", "-"],
+        input="\n".join(lines) + "\n",
+        text=True,
+        capture_output=True,
+    )
 
 def main():
     """Populate missing DateTimeOriginal tags from nearby JSON sidecars."""
-    for img in Path(".").rglob("*"):
-        if img.suffix.lower() not in IMAGE_EXTS:
-            continue
-        if not exif_missing(img):
-            continue
-
-        j = find_json(img)
-        if not j:
-            continue
-
-        ts = extract_ts(j)
-        if not ts:
-            continue
-
-        print(f"Fixing: {img}")
-        write_exif(img, ts)
+    # One stay_open exiftool services every read; forking a fresh perl
+    # process per file costs ~100ms startup each and dominates the run.
+    fixes: list[tuple[Path, str]] = []
+    with ExifToolHelper() as et:
+        for img in Path(".").rglob("*"):
+            if not img.name.lower().endswith(IMAGE_EXTS):
+                continue
+            if not exif_missing(img, et):
+                continue
+
+            j = find_json(img)
+            if not j:
+                continue
+
+            ts = extract_ts(j)
+            if not ts:
+                continue
+
+            print(f"Fixing: {img}")
+            fixes.append((img, ts))
+
+    write_exif_batch(fixes)
 
 if __name__ == "__main__":
     main()
@@ -1,27 +1,88 @@
 #!/usr/bin/env python3
 import argparse
-import subprocess
+import os
+from collections.abc import Iterator
 from pathlib import Path
 
-def exif_datetime_original(path: Path) -> str | None:
+from exiftool import ExifToolHelper
+
+# How many paths to hand exiftool per get_tags call.
+BATCH_SIZE = 1000
+
+# xattr memoizing the extracted timestamp: "mtime_ns:size:value" (empty
+# value = file known to have no DateTimeOriginal).
+_XATTR_KEY = "user.ppx.dt"
+
+def _cached_dt(path: str, st: os.stat_result) -> str | None:
+    """Return the memoized "mtime:size:value" payload's value if it still
+    matches the file's mtime/size; None when absent or stale. An empty
+    string means the file is known to lack DateTimeOriginal."""
+    try:
+        raw = os.getxattr(path, _XATTR_KEY).decode()
+    except (OSError, UnicodeDecodeError, AttributeError):
+        # AttributeError: os.getxattr only exists on Linux; on macOS the
+        # cache is simply a miss every time.
+        return None
+    mtime, _, rest = raw.partition(":")
+    size, _, val = rest.partition(":")
+    if mtime == str(st.st_mtime_ns) and size == str(st.st_size):
+        return val
+    return None
+
+def _store_dt(path: str, st: os.stat_result, val: str) -> None:
+    try:
+        os.setxattr(path, _XATTR_KEY, f"{st.st_mtime_ns}:{st.st_size}:{val}".encode())
+    except (OSError, AttributeError):
+        # read-only file, filesystem without xattr support (FAT/exFAT),
+        # or a platform without os.setxattr (macOS)
+        pass
+
+def exif_datetimes(files: list[Path]) -> dict[str, str | None]:
     """
-    Returns DateTimeOriginal formatted as YYYYMMDD-HHMMSS, or None if missing.
-    Uses exiftool for broad format support (JPG/HEIC/etc).
+    Returns {path: DateTimeOriginal formatted as YYYYMMDD-HHMMSS or None}.
+    Timestamps memoized in an xattr are read back with one syscall; only
+    files without a fresh cache entry go through exiftool, batched over a
+    single stay_open process.
     """
-    # -s -s -s => value only (no tag name), -d sets output format
-    cmd = [
-        "exiftool",
-        "-s", "-s", "-s",
-        "-d", "%Y%m%d-%H%M%S",
-        "-DateTimeOriginal",
-        str(path)
-    ]
-    r = subprocess.run(cmd, capture_output=True, text=True)
-    if r.returncode != 0:
-        # exiftool error (corrupt file, unsupported, etc.)
-        return None
-    val = r.stdout.strip()
-    return val if val else None
+    results: dict[str, str | None] = {str(p): None for p in files}
+    misses: list[str] = []
+    stats: dict[str, os.stat_result] = {}
+    for p in files:
+        sp = str(p)
+        try:
+            st = os.stat(sp)
+        except OSError:
+            continue
+        cached = _cached_dt(sp, st)
+        if cached is not None:
+            results[sp] = cached or None
+        else:
+            misses.append(sp)
+            stats[sp] = st
+
+    if not misses:
+        return results
+
+    with ExifToolHelper() as et:
+        for start in range(0, len(misses), BATCH_SIZE):
+            chunk = misses[start:start + BATCH_SIZE]
+            try:
+                records = et.get_tags(chunk, ["DateTimeOriginal"], params=["-d", "%Y%m%d-%H%M%S"])
+            except Exception:
+                # exiftool error (corrupt file, unsupported, etc.) -- leave
+                # this chunk's entries as None
+                continue
+            for rec in records:
+                src = rec.get("SourceFile")
+                if not src:
+                    continue
+                for k, v in rec.items():
+                    if k.endswith("DateTimeOriginal") and v:
+                        results[src] = str(v)
+                        break
+            for sp in chunk:
+                _store_dt(sp, stats[sp], results[sp] or "")
+    return results
 
 def next_available_name(dest_dir: Path, stem: str, suffix: str) -> Path:
     """
@@ -39,9 +100,8 @@ def next_available_name(dest_dir: Path, stem: str, suffix: str) -> Path:
             return candidate
         i += 1
 
-def rename_one(path: Path, prefix: str, dry_run: bool) -> tuple[bool, str]:
-    """Rename one file using DateTimeOriginal; returns (success, message)."""
-    dt = exif_datetime_original(path)
+def rename_one(path: Path, dt: str | None, prefix: str, dry_run: bool) -> tuple[bool, str]:
+    """Rename one file using its pre-fetched DateTimeOriginal; returns (success, message)."""
     if not dt:
         return False, f"SKIP (no DateTimeOriginal): {path}"
 
@@ -60,15 +120,36 @@ def rename_one(path: Path, prefix: str, dry_run: bool) -> tuple[bool, str]:
     path.rename(target)
     return True, f"RENAMED: {path.name}  ->  {target.name}"
 
-def iter_files(root: Path, recursive: bool) -> list[Path]:
-    """Return a list of files under root, optionally recursing."""
-    if root.is_file():
-        return [root]
+def iter_dir_files(root: Path, recursive: bool) -> Iterator[list[Path]]:
+    """Yield one complete file list per directory, optionally recursing.
 
-    if recursive:
-        return [p for p in root.rglob("*") if p.is_file()]
-    else:
-        return [p for p in root.iterdir() if p.is_file()]
+    Walks with os.scandir so file-type checks reuse what readdir already
+    returned. Each directory's listing is fully drained before it is
+    yielded: renaming inside a directory whose scandir iteration is
+    still open can re-yield the renamed entry on some filesystems, and
+    a re-yielded file would collide with itself and pick up a spurious
+    _1 suffix.
+    """
+    if root.is_file():
+        yield [root]
+        return
+
+    stack = [str(root)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        files: list[Path] = []
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    files.append(Path(entry.path))
+        if files:
+            yield files
 
 def main():
     """CLI entry: rename files by EXIF DateTimeOriginal with configurable prefix."""
@@ -83,16 +164,32 @@ def main():
     if not root.exists():
         raise SystemExit(f"Path does not exist: {root}")
 
-    files = iter_files(root, args.recursive)
-
+    total = 0
     ok = 0
-    for f in files:
-        success, msg = rename_one(f, args.prefix, args.dry_run)
-        print(msg)
-        if success:
-            ok += 1
 
-    print(f"\nDone. Processed: {len(files)} files. Renamed/OK/Dryrun: {ok}. Skipped: {len(files)-ok}.")
+    def process(chunk: list[Path]) -> None:
+        nonlocal total, ok
+        datetimes = exif_datetimes(chunk)
+        for f in chunk:
+            success, msg = rename_one(f, datetimes.get(str(f)), args.prefix, args.dry_run)
+            print(msg)
+            total += 1
+            if success:
+                ok += 1
+
+    # Accumulate whole directories until an exiftool batch fills up; memory
+    # stays bounded and the first renames still happen before the walk
+    # finishes, but never in a directory that is only partially listed.
+    chunk: list[Path] = []
+    for dir_files in iter_dir_files(root, args.recursive):
+        chunk.extend(dir_files)
+        if len(chunk) >= BATCH_SIZE:
+            process(chunk)
+            chunk = []
+    if chunk:
+        process(chunk)
+
+    print(f"\nDone. Processed: {total} files. Renamed/OK/Dryrun: {ok}. Skipped: {total-ok}.")
 
 if __name__ == "__main__":
     main()
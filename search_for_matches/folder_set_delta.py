@@ -9,8 +9,11 @@ Outputs in --out-dir:
 - summary.json        : counts + params + paths
 
 Matching:
-- Candidate: pHash + chunk inverted index (fast)
-- Confirm: ORB + RANSAC inliers (robust)
+- Candidate: pHash + indexed 16-bit band lookup in SQLite (fast)
+- Confirm: ORB via a global FLANN/LSH index + RANSAC inliers (robust)
+
+ORB features are computed once at index time and cached in SQLite;
+the match phase never decodes images.
 
 Supports: .jpg/.jpeg + .nef (via rawpy)
 """
@@ -22,18 +25,22 @@ import json
 import time
 import pathlib
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
-from collections import defaultdict, Counter
+from typing import Dict, Iterator, List, Tuple, Optional
+from collections import defaultdict
 
 import click
 import numpy as np
 from tqdm import tqdm
 from PIL import Image, ImageOps
-import imagehash
 import cv2
 import rawpy
 
+# Parallelism comes from our own pools (processes for indexing, threads
+# for matching); keep OpenCV's internal threading out of the way.
+cv2.setNumThreads(1)
+
 SUPPORTED_EXTS = {".jpg", ".jpeg", ".nef"}
 
 
@@ -45,7 +52,7 @@ SUPPORTED_EXTS = {".jpg", ".jpeg", ".nef"}
 class Entry:
     path: str
     ext: str
-    phash_hex: str
+    phash: bytes  # raw 8-byte pHash
 
 
 # ----------------------------
@@ -55,9 +62,38 @@ class Entry:
 def ensure_dir(p: str) -> None:
     pathlib.Path(p).mkdir(parents=True, exist_ok=True)
 
-def file_sig(path: str) -> Tuple[float, int]:
-    st = os.stat(path)
-    return (float(st.st_mtime), int(st.st_size))
+def iter_media(root: str, exts) -> Iterator[Tuple[str, str, float, int]]:
+    """Yield (path, ext, mtime, size) for media files under root.
+
+    scandir recursion reuses the type and stat data readdir already
+    fetched, instead of one Path object and stat call per entry like
+    rglob does.
+    """
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    name = entry.name
+                    dot = name.rfind(".")
+                    if dot < 0:
+                        continue
+                    ext = name[dot:].lower()
+                    if ext not in exts:
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield entry.path, ext, float(st.st_mtime), int(st.st_size)
 
 def _pil_prepare(img: Image.Image) -> Image.Image:
     img = ImageOps.exif_transpose(img)
@@ -75,6 +111,13 @@ def load_image(path: str, max_side: int) -> Optional[Image.Image]:
     try:
         if ext in (".jpg", ".jpeg"):
             with Image.open(path) as im:
+                # Let libjpeg decode at 1/2, 1/4 or 1/8 scale by skipping
+                # DCT blocks; draft() forwards the factor to the decoder.
+                w, h = im.size
+                scale = min(8, max(1, min(w, h) // max_side))
+                if scale > 1:
+                    im.draft("RGB", (w // scale, h // scale))
+                im.load()
                 im = _pil_prepare(im)
                 im.thumbnail((max_side, max_side))
                 return im.copy()
@@ -97,8 +140,36 @@ def load_image(path: str, max_side: int) -> Optional[Image.Image]:
 
     return None
 
-def phash_hex(img: Image.Image) -> str:
-    return str(imagehash.phash(img))
+# C++ pHash; an order of magnitude faster than the Python/NumPy imagehash one.
+_phasher = cv2.img_hash.PHash_create()
+
+# Popcount of every byte value, for vectorized Hamming distance.
+_POPCOUNT_LUT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+try:
+    from numba import njit as _njit
+except ImportError:
+    _njit = None
+
+if _njit is not None:
+    @_njit(cache=True)
+    def _hamming_scan(hashes: np.ndarray, target: np.uint64) -> np.ndarray:
+        """Kernighan popcount of hashes ^ target over a uint64 array."""
+        out = np.empty(hashes.shape[0], np.int32)
+        for i in range(hashes.shape[0]):
+            v = hashes[i] ^ target
+            c = 0
+            while v:
+                v &= v - np.uint64(1)
+                c += 1
+            out[i] = c
+        return out
+else:
+    _hamming_scan = None
+
+def phash_hex(gray: np.ndarray) -> str:
+    """64-bit pHash of a grayscale array as a 16-char hex string."""
+    return _phasher.compute(gray).tobytes().hex()
 
 def to_gray(img: Image.Image, max_side: int) -> np.ndarray:
     img = img.copy()
@@ -106,39 +177,64 @@ def to_gray(img: Image.Image, max_side: int) -> np.ndarray:
     arr = np.array(img)  # RGB
     return cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
 
-def phash_chunks(h: str, chunk_len: int = 4) -> List[str]:
-    return [h[i:i+chunk_len] for i in range(0, len(h), chunk_len)]
+def phash_bands(raw: bytes) -> Tuple[int, int, int, int]:
+    """Split a raw 64-bit hash into four 16-bit LSH bands."""
+    return tuple(int.from_bytes(raw[i:i + 2], "big") for i in range(0, 8, 2))
 
-def orb_score(grayA: np.ndarray, grayB: np.ndarray, nfeatures: int) -> Tuple[int, int]:
+def orb_features(gray: np.ndarray, nfeatures: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Detect ORB keypoints; returns (Nx2 float32 points, Nx32 uint8 descriptors)."""
     orb = cv2.ORB_create(nfeatures=nfeatures)
-    kpa, desa = orb.detectAndCompute(grayA, None)
-    kpb, desb = orb.detectAndCompute(grayB, None)
+    kps, desc = orb.detectAndCompute(gray, None)
+    if desc is None or kps is None or len(kps) < 10:
+        return None
+    pts = np.float32([kp.pt for kp in kps])
+    return (pts, desc)
 
-    if desa is None or desb is None or kpa is None or kpb is None:
-        return (0, 0)
-    if len(kpa) < 10 or len(kpb) < 10:
-        return (0, 0)
+def ransac_inliers(srcPts: np.ndarray, dstPts: np.ndarray) -> int:
+    _, mask = cv2.findHomography(srcPts.reshape(-1, 1, 2), dstPts.reshape(-1, 1, 2), cv2.RANSAC, 5.0)
+    return int(mask.sum()) if mask is not None else 0
 
-    bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=False)
-    matches = bf.knnMatch(desa, desb, k=2)
+# FLANN LSH parameters for 256-bit ORB descriptors.
+_FLANN_INDEX_LSH = dict(algorithm=6, table_number=6, key_size=12, multi_probe_level=1)
 
-    good = []
+def build_flann(
+    dst_entries: List[Entry],
+    dst_features: Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]],
+) -> Tuple[cv2.FlannBasedMatcher, List[int]]:
+    """One LSH index over every destination descriptor set.
+
+    Returns the trained matcher plus the mapping from FLANN image index
+    back to position in dst_entries.
+    """
+    flann = cv2.FlannBasedMatcher(_FLANN_INDEX_LSH, dict(checks=50))
+    img_to_entry: List[int] = []
+    for i, e in enumerate(dst_entries):
+        feats = dst_features.get(e.path)
+        if feats is None:
+            continue
+        flann.add([feats[1]])
+        img_to_entry.append(i)
+    flann.train()
+    return flann, img_to_entry
+
+def grouped_good_matches(
+    flann: cv2.FlannBasedMatcher,
+    img_to_entry: List[int],
+    src_desc: np.ndarray,
+) -> Dict[int, List[Tuple[int, int]]]:
+    """Query the global index once and bucket ratio-test survivors per dst entry."""
+    grouped: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+    try:
+        matches = flann.knnMatch(src_desc, k=2)
+    except cv2.error:
+        return grouped
     for m_n in matches:
         if len(m_n) != 2:
             continue
         m, n = m_n
         if m.distance < 0.75 * n.distance:
-            good.append(m)
-
-    if len(good) < 10:
-        return (len(good), 0)
-
-    ptsA = np.float32([kpa[m.queryIdx].pt for m in good]).reshape(-1, 1, 2)
-    ptsB = np.float32([kpb[m.trainIdx].pt for m in good]).reshape(-1, 1, 2)
-
-    _, mask = cv2.findHomography(ptsA, ptsB, cv2.RANSAC, 5.0)
-    inliers = int(mask.sum()) if mask is not None else 0
-    return (len(good), inliers)
+            grouped[img_to_entry[m.imgIdx]].append((m.queryIdx, m.trainIdx))
+    return grouped
 
 
 # ----------------------------
@@ -146,47 +242,110 @@ def orb_score(grayA: np.ndarray, grayB: np.ndarray, nfeatures: int) -> Tuple[int
 # ----------------------------
 
 def init_db(db_path: str) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
+    # check_same_thread off: match-phase reads come from worker threads and
+    # sqlite3 serializes access internally.
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+    # Older schemas (hex TEXT phash, no cached features, or the since-
+    # dropped gray blobs) can't be migrated in place; rebuild from scratch.
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(images)")}
+    if cols and (not {"b0", "orb_desc"} <= cols or "gray" in cols):
+        conn.execute("DROP TABLE images")
+
     conn.execute("""
         CREATE TABLE IF NOT EXISTS images (
             path TEXT PRIMARY KEY,
             ext  TEXT NOT NULL,
-            phash TEXT NOT NULL,
+            phash BLOB NOT NULL,
+            b0 INTEGER NOT NULL,
+            b1 INTEGER NOT NULL,
+            b2 INTEGER NOT NULL,
+            b3 INTEGER NOT NULL,
+            orb_pts BLOB,
+            orb_desc BLOB,
             mtime REAL NOT NULL,
             size  INTEGER NOT NULL
         )
     """)
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_images_phash ON images(phash)")
     conn.commit()
     return conn
 
-def upsert(conn: sqlite3.Connection, path: str, ext: str, h: str, mtime: float, size: int) -> None:
-    conn.execute("""
-        INSERT INTO images(path, ext, phash, mtime, size)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(path) DO UPDATE SET
-            ext=excluded.ext,
-            phash=excluded.phash,
-            mtime=excluded.mtime,
-            size=excluded.size
-    """, (path, ext, h, mtime, size))
+def ensure_band_indexes(conn: sqlite3.Connection) -> None:
+    """Create the b0..b3 lookup indexes; called after bulk indexing so
+    fresh databases don't pay index maintenance during the insert storm."""
+    for i in range(4):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_images_b{i} ON images(b{i})")
+    conn.commit()
+
+_UPSERT_SQL = """
+    INSERT INTO images(path, ext, phash, b0, b1, b2, b3,
+                       orb_pts, orb_desc, mtime, size)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(path) DO UPDATE SET
+        ext=excluded.ext,
+        phash=excluded.phash,
+        b0=excluded.b0,
+        b1=excluded.b1,
+        b2=excluded.b2,
+        b3=excluded.b3,
+        orb_pts=excluded.orb_pts,
+        orb_desc=excluded.orb_desc,
+        mtime=excluded.mtime,
+        size=excluded.size
+"""
+
+def upsert_row(
+    path: str,
+    ext: str,
+    h: str,
+    feats: Optional[Tuple[np.ndarray, np.ndarray]],
+    mtime: float,
+    size: int,
+) -> tuple:
+    """Parameter tuple for _UPSERT_SQL."""
+    raw = bytes.fromhex(h)
+    b0, b1, b2, b3 = phash_bands(raw)
+    pts_blob = feats[0].tobytes() if feats is not None else None
+    desc_blob = feats[1].tobytes() if feats is not None else None
+    return (path, ext, raw, b0, b1, b2, b3, pts_blob, desc_blob, mtime, size)
 
 def load_entries(conn: sqlite3.Connection) -> List[Entry]:
     rows = conn.execute("SELECT path, ext, phash FROM images").fetchall()
-    return [Entry(path=r[0], ext=r[1], phash_hex=r[2]) for r in rows]
-
-def update_index(conn: sqlite3.Connection, root_dir: str, max_side: int, progress: bool, label: str) -> None:
-    root = pathlib.Path(root_dir)
+    return [Entry(path=r[0], ext=r[1], phash=r[2]) for r in rows]
+
+def load_features(conn: sqlite3.Connection) -> Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]]:
+    """Load cached ORB (points, descriptors) per path; None where detection failed."""
+    feats: Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]] = {}
+    for path, pts_blob, desc_blob in conn.execute("SELECT path, orb_pts, orb_desc FROM images"):
+        if not pts_blob or not desc_blob:
+            feats[path] = None
+            continue
+        pts = np.frombuffer(pts_blob, dtype=np.float32).reshape(-1, 2)
+        feats[path] = (pts, np.frombuffer(desc_blob, dtype=np.uint8).reshape(len(pts), 32))
+    return feats
+
+def _hash_one(
+    job: Tuple[str, str, float, int, int, int]
+) -> Optional[Tuple[str, str, str, Optional[Tuple[np.ndarray, np.ndarray]], float, int]]:
+    """Pool worker: decode one image, compute pHash and ORB features."""
+    path, ext, mtime, size, max_side, orb_nfeatures = job
+    im = load_image(path, max_side=max_side)
+    if im is None:
+        return None
+    gray = to_gray(im, max_side=max_side)
+    # PHash reduces to 32x32 internally anyway; feed it a small INTER_AREA
+    # downscale so hashing doesn't re-read the full gray buffer.
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA)
+    return (path, ext, phash_hex(small), orb_features(gray, orb_nfeatures), mtime, size)
 
+def update_index(conn: sqlite3.Connection, root_dir: str, max_side: int, orb_nfeatures: int, progress: bool, label: str) -> None:
     disk: Dict[str, Tuple[str, float, int]] = {}
-    for p in root.rglob("*"):
-        if not p.is_file():
-            continue
-        ext = p.suffix.lower()
-        if ext not in SUPPORTED_EXTS:
-            continue
-        mtime, size = file_sig(str(p))
-        disk[str(p)] = (ext, mtime, size)
+    for path, ext, mtime, size in iter_media(root_dir, SUPPORTED_EXTS):
+        disk[path] = (ext, mtime, size)
 
     db_rows = conn.execute("SELECT path, mtime, size FROM images").fetchall()
     db_sig = {r[0]: (float(r[1]), int(r[2])) for r in db_rows}
@@ -205,16 +364,27 @@ def update_index(conn: sqlite3.Connection, root_dir: str, max_side: int, progres
     if not to_proc:
         return
 
-    it = to_proc
-    if progress:
-        it = tqdm(to_proc, desc=f"Index {label}", unit="file")
-
-    for (path, ext, mtime, size) in it:
-        im = load_image(path, max_side=max_side)
-        if im is None:
-            continue
-        h = phash_hex(im)
-        upsert(conn, path, ext, h, mtime, size)
+    # Decode + pHash is CPU-bound (libjpeg, rawpy debayer, DCT); fan it out
+    # across cores and keep SQLite writes in the main process.
+    jobs = [(path, ext, mtime, size, max_side, orb_nfeatures) for (path, ext, mtime, size) in to_proc]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        it = pool.map(_hash_one, jobs, chunksize=8)
+        if progress:
+            it = tqdm(it, total=len(jobs), desc=f"Index {label}", unit="file")
+
+        # Prepared statement + executemany in 1000-row batches instead of
+        # one parsed INSERT per file.
+        batch: List[tuple] = []
+        for res in it:
+            if res is None:
+                continue
+            batch.append(upsert_row(*res))
+            if len(batch) >= 1000:
+                conn.executemany(_UPSERT_SQL, batch)
+                conn.commit()
+                batch.clear()
+        if batch:
+            conn.executemany(_UPSERT_SQL, batch)
 
     conn.commit()
 
@@ -223,148 +393,227 @@ def update_index(conn: sqlite3.Connection, root_dir: str, max_side: int, progres
 # Candidate retrieval
 # ----------------------------
 
-def build_chunk_index(entries: List[Entry], chunk_len: int = 4) -> Dict[str, List[int]]:
-    idx = defaultdict(list)
-    for i, e in enumerate(entries):
-        for c in phash_chunks(e.phash_hex, chunk_len=chunk_len):
-            idx[c].append(i)
-    return idx
-
 def candidates_for_hash(
-    target_hash_hex: str,
-    dst_entries: List[Entry],
-    dst_chunk_index: Dict[str, List[int]],
+    target_hash: bytes,
+    dst_conn: sqlite3.Connection,
+    dst_path_to_idx: Dict[str, int],
     phash_max_dist: int,
     min_shared_chunks: int,
     max_candidates: int,
 ) -> List[Tuple[int, int]]:
-    counts = Counter()
-    for c in phash_chunks(target_hash_hex, chunk_len=4):
-        for i in dst_chunk_index.get(c, []):
-            counts[i] += 1
-
-    pre = [i for i, k in counts.items() if k >= min_shared_chunks]
-    if not pre:
+    # LSH-band prefilter pushed into SQLite: any image sharing a 16-bit band
+    # with the target comes back via the b0..b3 indexes, no in-memory scan.
+    b0, b1, b2, b3 = phash_bands(target_hash)
+    rows = dst_conn.execute("""
+        SELECT path, phash
+        FROM images
+        WHERE (b0=?1 OR b1=?2 OR b2=?3 OR b3=?4)
+          AND (b0=?1)+(b1=?2)+(b2=?3)+(b3=?4) >= ?5
+    """, (b0, b1, b2, b3, min_shared_chunks)).fetchall()
+    if not rows:
         return []
 
-    th = imagehash.hex_to_hash(target_hash_hex)
-    out: List[Tuple[int, int]] = []
-    for i in pre:
-        d = th - imagehash.hex_to_hash(dst_entries[i].phash_hex)
-        if d <= phash_max_dist:
-            out.append((i, int(d)))
+    paths: List[str] = [r[0] for r in rows]
+    blobs: List[bytes] = [r[1] for r in rows]
+
+    # One vectorized scan over all prefiltered hashes instead of a Python
+    # loop per candidate: compiled uint64 kernel when numba is available,
+    # XOR + byte-LUT popcount otherwise. Both sides share a byte order, so
+    # the XOR popcount is endian-independent.
+    joined = b"".join(blobs)
+    if _hamming_scan is not None:
+        dists = _hamming_scan(
+            np.frombuffer(joined, dtype=np.uint64),
+            np.frombuffer(target_hash, dtype=np.uint64)[0],
+        )
+    else:
+        packed = np.frombuffer(joined, dtype=np.uint8).reshape(-1, 8)
+        target = np.frombuffer(target_hash, dtype=np.uint8)
+        dists = _POPCOUNT_LUT[packed ^ target].sum(axis=1, dtype=np.int32)
 
-    out.sort(key=lambda x: x[1])
-    return out[:max_candidates]
+    keep = np.nonzero(dists <= phash_max_dist)[0]
+    order = keep[np.argsort(dists[keep], kind="stable")][:max_candidates]
+    return [(dst_path_to_idx[paths[i]], int(dists[i])) for i in order]
 
 
 # ----------------------------
-# Best match (one direction)
+# Bidirectional matching
 # ----------------------------
 
-def best_match(
-    src_entry: Entry,
-    dst_entries: List[Entry],
-    dst_index: Dict[str, List[int]],
-    dst_cache: Dict[int, Image.Image],
-    max_side: int,
-    phash_max_dist: int,
-    min_shared_chunks: int,
-    max_candidates: int,
-    orb_nfeatures: int,
-    orb_min_matches: int,
-    orb_min_inliers: int,
-) -> Optional[dict]:
-    src_img = load_image(src_entry.path, max_side=max_side)
-    if src_img is None:
-        return None
-
-    th_hex = phash_hex(src_img)
-    cand = candidates_for_hash(
-        th_hex, dst_entries, dst_index,
-        phash_max_dist=phash_max_dist,
-        min_shared_chunks=min_shared_chunks,
-        max_candidates=max_candidates,
+def _score_key(s: dict) -> Tuple[int, int, int, int]:
+    """Ranking for accepted pair scores: trusted pHash first, then ORB quality."""
+    return (
+        1 if s["confirmedBy"] == "phash" else 0,
+        s["orbInliers"] or 0,
+        s["orbGoodMatches"] or 0,
+        -s["phashDist"],
     )
-    if not cand:
-        return None
-
-    src_gray = to_gray(src_img, max_side=max_side)
 
-    best = None
-    best_key = (-1, -1, 999)  # (inliers, good, -dist) but we'll store dist separately
-
-    for idx, dist in cand:
-        if idx not in dst_cache:
-            im = load_image(dst_entries[idx].path, max_side=max_side)
-            if im is None:
-                continue
-            dst_cache[idx] = im
-        else:
-            im = dst_cache[idx]
-
-        good, inliers = orb_score(src_gray, to_gray(im, max_side=max_side), nfeatures=orb_nfeatures)
-
-        if good >= orb_min_matches and inliers >= orb_min_inliers:
-            key = (inliers, good, -dist)
-            if key > best_key:
-                best_key = key
-                best = {
-                    "dstPath": dst_entries[idx].path,
-                    "dstExt": dst_entries[idx].ext,
-                    "phashDist": dist,
-                    "orbGoodMatches": good,
-                    "orbInliers": inliers,
-                }
-
-    return best
-
-def match_direction(
-    src_entries: List[Entry],
-    dst_entries: List[Entry],
-    dst_index: Dict[str, List[int]],
-    max_side: int,
+def match_bidirectional(
+    entries_a: List[Entry],
+    entries_b: List[Entry],
+    conn_a: sqlite3.Connection,
+    conn_b: sqlite3.Connection,
     phash_max_dist: int,
+    phash_trust_dist: int,
     min_shared_chunks: int,
     max_candidates: int,
-    orb_nfeatures: int,
     orb_min_matches: int,
     orb_min_inliers: int,
     progress: bool,
-    label: str,
-) -> Tuple[List[dict], List[str]]:
-    dst_cache: Dict[int, Image.Image] = {}
-    matches: List[dict] = []
-    unmatched: List[str] = []
-
-    it = src_entries
-    if progress:
-        it = tqdm(src_entries, desc=f"Match {label}", unit="file")
-
-    for e in it:
-        m = best_match(
-            src_entry=e,
-            dst_entries=dst_entries,
-            dst_index=dst_index,
-            dst_cache=dst_cache,
-            max_side=max_side,
-            phash_max_dist=phash_max_dist,
-            min_shared_chunks=min_shared_chunks,
-            max_candidates=max_candidates,
-            orb_nfeatures=orb_nfeatures,
-            orb_min_matches=orb_min_matches,
-            orb_min_inliers=orb_min_inliers,
-        )
-        if m is None:
-            unmatched.append(e.path)
+) -> Tuple[List[dict], List[str], List[dict], List[str]]:
+    """Score every candidate (a, b) pair once and derive both directions.
+
+    Pair scores are symmetric, so each pair is scored at most once; but
+    candidate retrieval is not -- the trust shortcut and max_candidates
+    truncation are both one-sided. Retrieval therefore runs from both
+    sides and later passes skip pairs already scored, so the union of
+    both index buckets is visited. Returns (matches_a2b, a_minus_b,
+    matches_b2a, b_minus_a).
+    """
+    a_path_to_idx = {e.path: i for i, e in enumerate(entries_a)}
+    b_path_to_idx = {e.path: i for i, e in enumerate(entries_b)}
+    features_a = load_features(conn_a)
+    features_b = load_features(conn_b)
+
+    scores: Dict[Tuple[int, int], dict] = {}
+
+    def _score_pass(
+        src_entries: List[Entry],
+        src_features: Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]],
+        dst_entries: List[Entry],
+        dst_features: Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]],
+        dst_conn: sqlite3.Connection,
+        dst_path_to_idx: Dict[str, int],
+        flip: bool,
+        desc: str,
+    ) -> None:
+        """Score candidate pairs reachable from src_entries' retrieval side.
+
+        Keys are always (a index, b index); flip marks the B->A pass.
+        """
+        flann, img_to_entry = build_flann(dst_entries, dst_features)
+
+        def _score_source(item: Tuple[int, Entry]) -> Dict[Tuple[int, int], dict]:
+            si, e = item
+            key = (lambda dj: (dj, si)) if flip else (lambda dj: (si, dj))
+            local: Dict[Tuple[int, int], dict] = {}
+            cand = candidates_for_hash(
+                e.phash, dst_conn, dst_path_to_idx,
+                phash_max_dist=phash_max_dist,
+                min_shared_chunks=min_shared_chunks,
+                max_candidates=max_candidates,
+            )
+            if not cand:
+                return local
+
+            # Near-exact pHash with a clear gap to the runner-up is a
+            # reliable duplicate on its own; skip the ORB + RANSAC confirm
+            # for that pair. The remaining candidates still get scored
+            # below: a dst entry whose only bucket mate is this source
+            # must not lose its one chance at a score.
+            top_j, top_dist = cand[0]
+            unambiguous = len(cand) == 1 or cand[1][1] - top_dist >= 4
+            if top_dist <= phash_trust_dist and unambiguous:
+                if key(top_j) not in scores:
+                    local[key(top_j)] = {
+                        "phashDist": top_dist,
+                        "orbGoodMatches": None,
+                        "orbInliers": None,
+                        "confirmedBy": "phash",
+                    }
+                cand = cand[1:]
+
+            src_feats = src_features.get(e.path)
+            if src_feats is None or not cand:
+                return local
+            src_pts, src_desc = src_feats
+            grouped = grouped_good_matches(flann, img_to_entry, src_desc)
+
+            for j, dist in cand:
+                if key(j) in scores:
+                    continue
+                dst_feats = dst_features.get(dst_entries[j].path)
+                pairs = grouped.get(j)
+                if dst_feats is None or not pairs or len(pairs) < 10:
+                    continue
+
+                good = len(pairs)
+                if good < orb_min_matches:
+                    continue
+
+                # RANSAC confirm only for candidates the global index agrees on.
+                srcPts = src_pts[[q for q, _t in pairs]]
+                dstPts = dst_feats[0][[t for _q, t in pairs]]
+                inliers = ransac_inliers(srcPts, dstPts)
+
+                if inliers >= orb_min_inliers:
+                    local[key(j)] = {
+                        "phashDist": dist,
+                        "orbGoodMatches": good,
+                        "orbInliers": inliers,
+                        "confirmedBy": "orb",
+                    }
+            return local
+
+        # FLANN queries, RANSAC and the SQLite lookups all release the GIL,
+        # so threads overlap the native work; each returns its own score
+        # slice and only the main thread touches the shared table.
+        # setdefault keeps the first pass's value if a worker re-scored a
+        # pair it hadn't seen land yet.
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+            results = ex.map(_score_source, enumerate(src_entries))
+            if progress:
+                results = tqdm(results, total=len(src_entries), desc=desc, unit="file")
+            for local in results:
+                for k, v in local.items():
+                    scores.setdefault(k, v)
+
+    _score_pass(entries_a, features_a, entries_b, features_b,
+                conn_b, b_path_to_idx, False, "Match A->B")
+    _score_pass(entries_b, features_b, entries_a, features_a,
+                conn_a, a_path_to_idx, True, "Match B->A")
+
+    # Best partner per side from the shared score table.
+    best_for_a: Dict[int, int] = {}
+    best_for_b: Dict[int, int] = {}
+    for (i, j), s in scores.items():
+        if i not in best_for_a or _score_key(s) > _score_key(scores[(i, best_for_a[i])]):
+            best_for_a[i] = j
+        if j not in best_for_b or _score_key(s) > _score_key(scores[(best_for_b[j], j)]):
+            best_for_b[j] = i
+
+    matches_a2b = []
+    a_minus_b = []
+    for i, e in enumerate(entries_a):
+        j = best_for_a.get(i)
+        if j is None:
+            a_minus_b.append(e.path)
+        else:
+            matches_a2b.append({
+                "srcPath": e.path,
+                "srcExt": e.ext,
+                "dstPath": entries_b[j].path,
+                "dstExt": entries_b[j].ext,
+                **scores[(i, j)],
+            })
+
+    matches_b2a = []
+    b_minus_a = []
+    for j, e in enumerate(entries_b):
+        i = best_for_b.get(j)
+        if i is None:
+            b_minus_a.append(e.path)
         else:
-            matches.append({
+            matches_b2a.append({
                 "srcPath": e.path,
                 "srcExt": e.ext,
-                **m
+                "dstPath": entries_a[i].path,
+                "dstExt": entries_a[i].ext,
+                **scores[(i, j)],
             })
 
-    return matches, unmatched
+    return matches_a2b, a_minus_b, matches_b2a, b_minus_a
 
 
 # ----------------------------
@@ -378,6 +627,7 @@ def match_direction(
 @click.option("--db-dir", default=".set_delta_index", show_default=True, help="Directory for SQLite indices")
 @click.option("--max-side", default=900, show_default=True, type=int, help="Decode size (speed/robustness)")
 @click.option("--phash-max-dist", default=10, show_default=True, type=int, help="Max pHash distance")
+@click.option("--phash-trust-dist", default=2, show_default=True, type=int, help="Accept without ORB at or below this pHash distance")
 @click.option("--min-shared-chunks", default=2, show_default=True, type=int, help="Prefilter strictness")
 @click.option("--max-candidates", default=30, show_default=True, type=int, help="Max candidates per file")
 @click.option("--orb-nfeatures", default=1500, show_default=True, type=int, help="ORB features")
@@ -391,6 +641,7 @@ def main(
     db_dir: str,
     max_side: int,
     phash_max_dist: int,
+    phash_trust_dist: int,
     min_shared_chunks: int,
     max_candidates: int,
     orb_nfeatures: int,
@@ -406,13 +657,15 @@ def main(
 
     click.echo(f"[A] Updating index in {db_a} ...")
     conn_a = init_db(db_a)
-    update_index(conn_a, set_a, max_side=max_side, progress=progress, label="A")
+    update_index(conn_a, set_a, max_side=max_side, orb_nfeatures=orb_nfeatures, progress=progress, label="A")
+    ensure_band_indexes(conn_a)
     entries_a = load_entries(conn_a)
     click.echo(f"[A] Indexed: {len(entries_a)}")
 
     click.echo(f"[B] Updating index in {db_b} ...")
     conn_b = init_db(db_b)
-    update_index(conn_b, set_b, max_side=max_side, progress=progress, label="B")
+    update_index(conn_b, set_b, max_side=max_side, orb_nfeatures=orb_nfeatures, progress=progress, label="B")
+    ensure_band_indexes(conn_b)
     entries_b = load_entries(conn_b)
     click.echo(f"[B] Indexed: {len(entries_b)}")
 
@@ -421,42 +674,19 @@ def main(
     if not entries_b:
         raise SystemExit("Set B indexed 0 files. Check extensions and path.")
 
-    click.echo("[A] Building chunk index ...")
-    idx_a = build_chunk_index(entries_a)
-
-    click.echo("[B] Building chunk index ...")
-    idx_b = build_chunk_index(entries_b)
-
-    # A -> B
-    matches_a2b, a_minus_b = match_direction(
-        src_entries=entries_a,
-        dst_entries=entries_b,
-        dst_index=idx_b,
-        max_side=max_side,
-        phash_max_dist=phash_max_dist,
-        min_shared_chunks=min_shared_chunks,
-        max_candidates=max_candidates,
-        orb_nfeatures=orb_nfeatures,
-        orb_min_matches=orb_min_matches,
-        orb_min_inliers=orb_min_inliers,
-        progress=progress,
-        label="A->B",
-    )
-
-    # B -> A
-    matches_b2a, b_minus_a = match_direction(
-        src_entries=entries_b,
-        dst_entries=entries_a,
-        dst_index=idx_a,
-        max_side=max_side,
+    # One symmetric pass covers A -> B and B -> A
+    matches_a2b, a_minus_b, matches_b2a, b_minus_a = match_bidirectional(
+        entries_a=entries_a,
+        entries_b=entries_b,
+        conn_a=conn_a,
+        conn_b=conn_b,
         phash_max_dist=phash_max_dist,
+        phash_trust_dist=phash_trust_dist,
         min_shared_chunks=min_shared_chunks,
         max_candidates=max_candidates,
-        orb_nfeatures=orb_nfeatures,
         orb_min_matches=orb_min_matches,
         orb_min_inliers=orb_min_inliers,
         progress=progress,
-        label="B->A",
     )
 
     # Write outputs
@@ -489,6 +719,7 @@ def main(
         "params": {
             "maxSide": max_side,
             "phashMaxDist": phash_max_dist,
+            "phashTrustDist": phash_trust_dist,
             "minSharedChunks": min_shared_chunks,
             "maxCandidates": max_candidates,
             "orbNFeatures": orb_nfeatures,